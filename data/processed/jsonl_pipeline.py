@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Streaming post-processing for fine-tuning JSONL files.
+
+A Pipeline chains map, filter and dedup stages and applies them in one read/write pass.
+Lines are parsed and the leading map/filter stages run in worker processes, in batches, with
+output order preserved; dedup (and any stage after it) runs in the parent, which owns the
+seen-set. Every stage keeps n_in / n_out / n_dropped counters.
+
+    python jsonl_pipeline.py IN.jsonl OUT.jsonl --clean-markdown --syntax-filter --dedup
+"""
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from qa_engine import clean_markdown_preserve
+
+MAP, FILTER, DEDUP = "map", "filter", "dedup"
+
+KEEP_SYNTAX_SHEETS = {"fs1_py3122", "fs2_py3123"}
+SYNTAX_QUESTION = "syntax or language-level changes"
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step. `fn` must be picklable (module-level function or class instance)
+    for map/filter stages, which run in worker processes:
+      map:    fn(record) -> record
+      filter: fn(record) -> bool, False drops the record
+      dedup:  fn(record) -> hashable key, later records with a seen key are dropped
+    """
+    name: str
+    kind: str
+    fn: Callable
+    n_in: int = 0
+    n_out: int = 0
+
+    @property
+    def n_dropped(self) -> int:
+        return self.n_in - self.n_out
+
+
+def map_stage(name: str, fn: Callable[[dict], dict]) -> Stage:
+    return Stage(name, MAP, fn)
+
+
+def filter_stage(name: str, predicate: Callable[[dict], bool]) -> Stage:
+    return Stage(name, FILTER, predicate)
+
+
+def dedup_stage(name: str, key: Callable[[dict], Hashable]) -> Stage:
+    return Stage(name, DEDUP, key)
+
+
+# -------------------------------------------------------------------
+# Stock stages
+# -------------------------------------------------------------------
+
+def message_content(ex: dict, role: str) -> str:
+    for msg in ex.get("messages", []):
+        if msg.get("role") == role:
+            return msg.get("content", "")
+    return ""
+
+
+def clean_markdown_record(ex: dict) -> dict:
+    for msg in ex.get("messages", []):
+        msg["content"] = clean_markdown_preserve(msg["content"])
+    return ex
+
+
+def keeps_syntax_question(ex: dict) -> bool:
+    """Syntax/language-level questions are only kept for sheets whose notes cover syntax."""
+    msgs = ex.get("messages", [])
+    user_q = msgs[1]["content"] if len(msgs) > 1 else ""
+    if SYNTAX_QUESTION in user_q.lower():
+        return ex.get("source_sheet", "") in KEEP_SYNTAX_SHEETS
+    return True
+
+
+class LengthFilter:
+    """Keep records whose `role` message length is within [min_len, max_len]."""
+
+    def __init__(self, role: str, min_len: int = 0, max_len: Optional[int] = None):
+        self.role = role
+        self.min_len = min_len
+        self.max_len = max_len
+
+    def __call__(self, ex: dict) -> bool:
+        n = len(message_content(ex, self.role))
+        return n >= self.min_len and (self.max_len is None or n <= self.max_len)
+
+
+def question_answer_key(ex: dict) -> Tuple[str, str]:
+    return message_content(ex, "user"), message_content(ex, "assistant")
+
+
+# -------------------------------------------------------------------
+# Runner
+# -------------------------------------------------------------------
+
+def _apply(line: str, stages: List[Stage]) -> Tuple[Optional[dict], int]:
+    """
+    Worker: parse one line and run map/filter stages on it.
+    Returns (record, number of stages passed); record is None if a filter dropped it.
+    """
+    ex = json.loads(line)
+    for i, stage in enumerate(stages):
+        if stage.kind == MAP:
+            ex = stage.fn(ex)
+        elif not stage.fn(ex):
+            return None, i
+    return ex, len(stages)
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], workers: Optional[int] = None, batch_size: int = 4096):
+        self.stages = stages
+        self.workers = workers
+        self.batch_size = batch_size
+        # Leading map/filter stages go to the workers; the rest need shared state
+        split = next((i for i, s in enumerate(stages) if s.kind == DEDUP), len(stages))
+        self._remote, self._local = stages[:split], stages[split:]
+
+    def _count(self, passed: int) -> None:
+        for stage in self._remote[:passed]:
+            stage.n_in += 1
+            stage.n_out += 1
+        if passed < len(self._remote):
+            self._remote[passed].n_in += 1
+
+    def _run_local(self, ex: dict, seen: List[set]) -> Optional[dict]:
+        for stage, keys in zip(self._local, seen):
+            stage.n_in += 1
+            if stage.kind == MAP:
+                ex = stage.fn(ex)
+            elif stage.kind == FILTER:
+                if not stage.fn(ex):
+                    return None
+            else:
+                key = stage.fn(ex)
+                if key in keys:
+                    return None
+                keys.add(key)
+            stage.n_out += 1
+        return ex
+
+    def process(self, lines: Iterable[str]) -> Iterator[dict]:
+        """Run every stage over JSON lines (blank lines are skipped), yielding kept records in order."""
+        lines = (line for line in (raw.strip() for raw in lines) if line)
+        seen = [set() for _ in self._local]
+        worker = partial(_apply, stages=self._remote)
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers != 0 else None
+        try:
+            while True:
+                batch = list(islice(lines, self.batch_size))
+                if not batch:
+                    break
+                chunksize = max(1, len(batch) // (4 * (self.workers or 8)))
+                results = pool.map(worker, batch, chunksize=chunksize) if pool else map(worker, batch)
+                for ex, passed in results:
+                    self._count(passed)
+                    if ex is None:
+                        continue
+                    ex = self._run_local(ex, seen)
+                    if ex is not None:
+                        yield ex
+        finally:
+            if pool:
+                pool.shutdown()
+
+    def run(self, input_path: Path, output_path: Path) -> Tuple[int, int]:
+        """Stream input_path through the pipeline into output_path. Returns (n_in, n_out)."""
+        n_in = n_out = 0
+
+        def counted(f):
+            nonlocal n_in
+            for line in f:
+                if line.strip():
+                    n_in += 1
+                yield line
+
+        with Path(input_path).open("r", encoding="utf-8") as fin, Path(output_path).open("w", encoding="utf-8") as fout:
+            for ex in self.process(counted(fin)):
+                fout.write(json.dumps(ex, ensure_ascii=False) + "\n")
+                n_out += 1
+        return n_in, n_out
+
+    def report(self) -> None:
+        for stage in self.stages:
+            print(f"{stage.name:<16} in={stage.n_in:<8} out={stage.n_out:<8} dropped={stage.n_dropped}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean and filter a fine-tuning JSONL file in one streaming pass")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--clean-markdown", action="store_true", help="Strip bold/italic markers from every message")
+    parser.add_argument("--syntax-filter", action="store_true", help="Drop syntax questions outside KEEP_SYNTAX_SHEETS")
+    parser.add_argument("--min-answer-len", type=int, default=0)
+    parser.add_argument("--max-answer-len", type=int, default=None)
+    parser.add_argument("--dedup", action="store_true", help="Drop repeated (question, answer) pairs")
+    parser.add_argument("--workers", type=int, default=None, help="Parsing processes (0 = in-process)")
+    args = parser.parse_args()
+
+    stages = []
+    if args.clean_markdown:
+        stages.append(map_stage("clean_markdown", clean_markdown_record))
+    if args.syntax_filter:
+        stages.append(filter_stage("syntax_sheets", keeps_syntax_question))
+    if args.min_answer_len or args.max_answer_len is not None:
+        stages.append(filter_stage("answer_length", LengthFilter("assistant", args.min_answer_len, args.max_answer_len)))
+    if args.dedup:
+        stages.append(dedup_stage("dedup", question_answer_key))
+
+    pipeline = Pipeline(stages, workers=args.workers)
+    n_in, n_out = pipeline.run(args.input, args.output)
+    pipeline.report()
+    print("Input examples:", n_in)
+    print("Kept examples:", n_out)
+    print("Dropped examples:", n_in - n_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Shared QA-generation engine for the fine-tuning datasets.
+
+generate_qa.py, generate_qa_scaled.py and generate_qa_scaled_big.py only differ in their
+templates, paraphrasing, keyword lists and output path; they now describe those as a
+GenerationConfig and call run(). Factsheets are processed in a process pool and entries are
+streamed, in factsheet order, to one JSONL file or to fixed-size shards.
+"""
+import json
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# -------------------------------------------------------------------
+# Config
+# -------------------------------------------------------------------
+CURRENT_DIR = Path(__file__).resolve().parent
+FACTSHEET_FILE = CURRENT_DIR / "python_factsheets.jsonl"
+
+SYSTEM_PROMPT = (
+    "You are a helpful Python programming assistant. "
+    "Answer concisely and accurately based on the Python release information."
+)
+
+NO_ANSWER = "The available release notes do not contain enough information to answer this question."
+
+# Sentence buckets: a sentence goes into every bucket whose keywords it contains,
+# and into "summary" if it matches none.
+DEFAULT_BUCKET_KEYWORDS = {
+    "security": ["security", "vulnerab", "hardening"],
+    "cve": ["cve-", "cve "],
+    "pep": ["pep ", "pep-"],
+    "blocker": ["release blocker", "blocker"],
+    "regression": ["regression", "stability", "crash", "race condition"],
+    "modules": ["module", "standard library", "stdlib", "library"],
+    "comparison": ["compare", "previous release", "follow-up", "maintenance release"],
+}
+
+# Question classification: the first bucket (in order) whose keywords match wins.
+DEFAULT_QUESTION_KEYWORDS = {
+    "security": ["security", "cve", "vulnerab", "advisories"],
+    "pep": ["pep", "accepted wording", "changed status"],
+    "blocker": ["release blocker", "blocker"],
+    "regression": ["regression", "crash", "stability"],
+    "modules": ["module", "standard library", "libraries", "components"],
+    "comparison": ["compare", "previous release", "different from"],
+}
+
+# Explicit evaluation questions per sheet_id
+DEFAULT_EVAL_QUESTIONS = {
+    "fs1_py3122": [
+        "What was added in Python 3.12.2, released in March 2024?",
+    ],
+    "fs2_py3123": [
+        "What specific bug fixes and security advisories were included in Python 3.12.3, released in April 2024?",
+    ],
+    "fs4_py312x_mid2024_cves": [
+        "Which CVEs were fixed in Python 3.12.x during mid-2024, and which modules were impacted?",
+    ],
+    "fs5_peps_314_status_delta": [
+        "Which PEPs targeting Python 3.14 changed status between alpha and beta, and what changed in their Accepted wording?",
+    ],
+    "fs6_3131_release_blockers": [
+        "What were the documented release blockers and notable open issues before the Python 3.13.1 release, and which of them were resolved by the time 3.13.1 shipped?",
+    ],
+}
+
+
+@dataclass
+class TopicTemplates:
+    """
+    Question templates added when any `when` field of the sheet contains the given text
+    (case-insensitive), e.g. {"topic_type": "security"}.
+    """
+    when: Dict[str, str]
+    templates: List[str]
+
+    def applies_to(self, sheet: dict) -> bool:
+        return any(needle.lower() in str(sheet.get(key, "")).lower() for key, needle in self.when.items())
+
+
+@dataclass
+class GenerationConfig:
+    """
+    Everything that used to differ between the generate_qa* copies.
+
+    Question templates are str.format strings over {label}, {version} and {title}.
+    Paraphrase intros are format strings over {q} (the question), {q_low} (first letter
+    lower-cased), {core} (without the trailing "?") and {core_low}. Each substitution set
+    is a list of (old, new) replacements applied in order to produce one more variant.
+    If a question contains any of `compare_triggers`, `compare_template` adds one more
+    variant; it also sees {rest}, the core with `compare_strip` prefixes removed.
+    `paraphrase_depth` caps the extra variants per base question (None = all of them).
+
+    With `cross_product`, variants instead come from a ParaphraseGrid: every substitution
+    set (or none) combined with every intro (or none), plus the compare template. Then
+    `variants_per_question` samples that many variants of each base question, and
+    `target_size` spreads exactly that many entries over all base questions; sampling is
+    seeded by `seed`, so the same config always yields the same dataset.
+    """
+    output_path: Path
+    factsheet_file: Path = FACTSHEET_FILE
+    system_prompt: str = SYSTEM_PROMPT
+    generic_templates: List[str] = field(default_factory=list)
+    topic_templates: List[TopicTemplates] = field(default_factory=list)
+    eval_questions: Dict[str, List[str]] = field(default_factory=lambda: dict(DEFAULT_EVAL_QUESTIONS))
+    intros: List[str] = field(default_factory=list)
+    substitutions: List[List[Tuple[str, str]]] = field(default_factory=list)
+    compare_triggers: List[str] = field(default_factory=list)
+    compare_template: str = ""
+    compare_strip: List[str] = field(default_factory=list)
+    paraphrase_depth: Optional[int] = None
+    cross_product: bool = False
+    variants_per_question: Optional[int] = None
+    target_size: Optional[int] = None
+    seed: int = 0
+    bucket_keywords: Dict[str, List[str]] = field(default_factory=lambda: dict(DEFAULT_BUCKET_KEYWORDS))
+    question_keywords: Dict[str, List[str]] = field(default_factory=lambda: dict(DEFAULT_QUESTION_KEYWORDS))
+    answer_sentences: int = 4
+    shard_size: Optional[int] = None  # entries per shard; None writes output_path as one file
+    workers: Optional[int] = None     # 0 generates in-process, streaming entry by entry
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+
+def iter_factsheets(path: Path) -> Iterator[dict]:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield json.loads(line)
+
+
+def load_factsheets(path: Path):
+    return list(iter_factsheets(path))
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_STRONG = re.compile(r'(\*\*|__)(.*?)\1')
+_EMPHASIS = re.compile(r'(\*|_)(.*?)\1')
+
+
+def simple_sentence_split(text: str):
+    text = text.replace("\n", " ")
+    parts = _SENTENCE_END.split(text)
+    return [s.strip() for s in parts if s.strip()]
+
+
+def clean_markdown_preserve(text: str) -> str:
+    if "*" not in text and "_" not in text:
+        return text
+    text = _STRONG.sub(r'\2', text)
+    text = _EMPHASIS.sub(r'\2', text)
+    return text
+
+
+def dedup_preserve_order(items: Iterable[str]) -> List[str]:
+    seen = set()
+    out = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            out.append(item)
+    return out
+
+
+class KeywordClassifier:
+    """
+    Assigns every label whose keywords occur in a text (case-insensitive substring match)
+    in a single regex pass.
+
+    All keywords of all labels are compiled into one lookahead alternation, longest first, so
+    each start position reports its longest hit; shorter keywords starting at the same position
+    are prefixes of that hit and are folded into its label mask up front. Results are cached,
+    since the same sentences and paraphrased questions recur across sheets.
+    """
+
+    def __init__(self, labels: Dict[str, List[str]], cache_size: int = 65536):
+        self.names = list(labels)
+        bit = {name: 1 << i for i, name in enumerate(self.names)}
+        masks: Dict[str, int] = {}
+        for name, keywords in labels.items():
+            for k in keywords:
+                if k:
+                    masks[k.lower()] = masks.get(k.lower(), 0) | bit[name]
+        ordered = sorted(masks, key=len, reverse=True)
+        alternation = "|".join(re.escape(k) for k in ordered) or r"(?!)"
+        self._pattern = re.compile(f"(?=({alternation}))")
+        self._masks = {k: 0 for k in ordered}
+        for k in ordered:
+            for p in ordered:
+                if k.startswith(p):
+                    self._masks[k] |= masks[p]
+        self.mask = lru_cache(maxsize=cache_size)(self._mask)
+
+    def _mask(self, text: str) -> int:
+        mask = 0
+        for m in self._pattern.finditer(text.lower()):
+            mask |= self._masks[m.group(1)]
+        return mask
+
+    def labels(self, text: str) -> List[str]:
+        """Every matching label, in declaration order."""
+        mask = self.mask(text)
+        return [name for i, name in enumerate(self.names) if mask >> i & 1]
+
+    def first(self, text: str, default: str = "summary") -> str:
+        """The first matching label in declaration order (the priority order), or `default`."""
+        mask = self.mask(text)
+        if not mask:
+            return default
+        return self.names[(mask & -mask).bit_length() - 1]
+
+
+@lru_cache(maxsize=None)
+def _classifier(labels: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> KeywordClassifier:
+    return KeywordClassifier({name: list(keywords) for name, keywords in labels})
+
+
+def classifier_for(labels: Dict[str, List[str]]) -> KeywordClassifier:
+    """Shared classifier (and cache) per keyword table, reused for every sheet in a process."""
+    return _classifier(tuple((name, tuple(keywords)) for name, keywords in labels.items()))
+
+
+def build_sentence_buckets(notes: str, bucket_keywords: Dict[str, List[str]]):
+    notes = clean_markdown_preserve(notes)
+    sentences = simple_sentence_split(notes)
+    classifier = classifier_for(bucket_keywords)
+
+    buckets = {"summary": []}
+    buckets.update({name: [] for name in bucket_keywords})
+
+    for s in sentences:
+        labels = classifier.labels(s)
+        for name in labels:
+            buckets[name].append(s)
+        if not labels:
+            buckets["summary"].append(s)
+
+    if not buckets["summary"] and sentences:
+        buckets["summary"] = sentences[:2]
+
+    return buckets
+
+
+def natural_version_label(sheet):
+    version = sheet.get("version")
+    if version:
+        return f"Python {version}"
+    title = sheet.get("topic_title", "this Python release")
+    return title
+
+
+# -------------------------------------------------------------------
+# Questions and paraphrases
+# -------------------------------------------------------------------
+
+def base_questions_for_sheet(sheet, config: GenerationConfig):
+    label = natural_version_label(sheet)
+    fields = {
+        "label": label,
+        "title": sheet.get("topic_title", label),
+        "version": sheet.get("version", ""),
+    }
+    q = [t.format(**fields) for t in config.generic_templates]
+    for topic in config.topic_templates:
+        if topic.applies_to(sheet):
+            q += [t.format(**fields) for t in topic.templates]
+    q += config.eval_questions.get(sheet.get("sheet_id", ""), [])
+    return dedup_preserve_order(q)
+
+
+def _lower_first(text: str) -> str:
+    return text[0].lower() + text[1:] if text else text
+
+
+def _rewrite(q: str, replacements: List[Tuple[str, str]]) -> str:
+    for old, new in replacements:
+        q = q.replace(old, new)
+    return q
+
+
+def _compare_variant(q: str, config: GenerationConfig, fields: dict) -> Optional[str]:
+    if not config.compare_template or not any(k in q.lower() for k in config.compare_triggers):
+        return None
+    rest = q
+    for prefix in config.compare_strip:
+        rest = rest.replace(prefix, "")
+    return config.compare_template.format(rest=rest.rstrip("?"), **fields)
+
+
+def _intro_fields(q: str) -> dict:
+    core = q.rstrip("?")
+    return {"q": q, "q_low": _lower_first(q), "core": core, "core_low": _lower_first(core)}
+
+
+def paraphrase_question(q: str, config: GenerationConfig):
+    """
+    Surface variants of a base question, the question itself first, in a stable order.
+    """
+    fields = _intro_fields(q)
+
+    variants = [q]
+    variants += [intro.format(**fields) for intro in config.intros]
+    variants += [_rewrite(q, replacements) for replacements in config.substitutions]
+    compare = _compare_variant(q, config, fields)
+    if compare:
+        variants.append(compare)
+
+    variants = dedup_preserve_order(v for v in variants if v.strip())
+    if config.paraphrase_depth is not None:
+        variants = variants[: 1 + config.paraphrase_depth]
+    return variants
+
+
+class ParaphraseGrid:
+    """
+    Lazy cross product of (no substitution + each substitution set) x (no intro + each intro
+    + the compare template, if the rewritten question triggers it) for one base question.
+
+    Only the distinct rewrites are computed up front, so len() is exact and any variant can
+    be built from its index without materializing the others.
+    """
+
+    def __init__(self, q: str, config: GenerationConfig):
+        self.question = q
+        self._config = config
+        self._intros = dedup_preserve_order(config.intros)
+        self._rewrites = dedup_preserve_order([q] + [_rewrite(q, r) for r in config.substitutions])
+        self._compares = [_compare_variant(r, config, _intro_fields(r)) for r in self._rewrites]
+        self._sizes = [1 + len(self._intros) + (c is not None) for c in self._compares]
+
+    def __len__(self) -> int:
+        return sum(self._sizes)
+
+    def __getitem__(self, index: int) -> str:
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        for rewrite, compare, size in zip(self._rewrites, self._compares, self._sizes):
+            if index < size:
+                break
+            index -= size
+        if index == 0:
+            return rewrite
+        if index <= len(self._intros):
+            return self._intros[index - 1].format(**_intro_fields(rewrite))
+        return compare
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def sample(self, n: int, rng: random.Random) -> Iterator[str]:
+        """n distinct variants chosen by rng, yielded in grid order."""
+        if n >= len(self):
+            yield from self
+            return
+        for i in sorted(rng.sample(range(len(self)), n)):
+            yield self[i]
+
+
+def allocate(counts: List[int], target: int) -> List[int]:
+    """
+    Split `target` over buckets in proportion to `counts` (largest-remainder method, ties to
+    the earlier bucket). Every share is at most its count; the shares sum to
+    min(target, sum(counts)).
+    """
+    total = sum(counts)
+    if target >= total:
+        return list(counts)
+    shares = [target * c // total for c in counts]
+    by_remainder = sorted(range(len(counts)), key=lambda i: (-(target * counts[i] % total), i))
+    for i in by_remainder[: target - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+# -------------------------------------------------------------------
+# Answer selection
+# -------------------------------------------------------------------
+
+def classify_question(question: str, question_keywords: Dict[str, List[str]]):
+    # The first bucket (in order) whose keywords match wins
+    return classifier_for(question_keywords).first(question)
+
+
+def build_answer_for_question(question: str, buckets: dict, config: GenerationConfig):
+    bucket_key = classify_question(question, config.question_keywords)
+    candidates = buckets.get(bucket_key, [])
+    if not candidates:
+        candidates = buckets.get("summary", [])
+    if not candidates:
+        return NO_ANSWER
+    return " ".join(candidates[: config.answer_sentences])
+
+
+def build_training_entry(question: str, answer: str, sheet_id: str, system_prompt: str = SYSTEM_PROMPT):
+    return {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer},
+        ],
+        "source_sheet": sheet_id,
+    }
+
+
+def _grid_sizes(sheet: dict, config: GenerationConfig) -> List[int]:
+    """Variants each base question of `sheet` contributes, after variants_per_question."""
+    sizes = [len(ParaphraseGrid(q, config)) for q in base_questions_for_sheet(sheet, config)]
+    if config.variants_per_question is not None:
+        sizes = [min(n, config.variants_per_question) for n in sizes]
+    return sizes
+
+
+def plan_quotas(config: GenerationConfig) -> List[List[int]]:
+    """
+    Per sheet, per base question: how many variants to emit so the dataset has exactly
+    `target_size` entries (or all of them if the grids are smaller). Only counts are kept.
+    """
+    sizes = [_grid_sizes(sheet, config) for sheet in iter_factsheets(config.factsheet_file)]
+    shares = iter(allocate([n for sheet in sizes for n in sheet], config.target_size))
+    return [[next(shares) for _ in sheet] for sheet in sizes]
+
+
+def iter_sheet_entries(sheet: dict, config: GenerationConfig, quotas: Optional[List[int]] = None) -> Iterator[dict]:
+    """
+    Training entries for one factsheet, yielded one at a time.
+    """
+    sheet_id = sheet.get("sheet_id", "unknown_sheet")
+    buckets = build_sentence_buckets(sheet.get("detailed_notes", ""), config.bucket_keywords)
+    base = base_questions_for_sheet(sheet, config)
+
+    if config.cross_product:
+        if quotas is None:
+            quotas = _grid_sizes(sheet, config)
+        questions = (
+            variant
+            for q, n in zip(base, quotas)
+            for variant in ParaphraseGrid(q, config).sample(n, random.Random(f"{config.seed}:{sheet_id}:{q}"))
+        )
+    else:
+        # Deduplicate across the whole sheet (exact string only)
+        questions = dedup_preserve_order(v for q in base for v in paraphrase_question(q, config))
+
+    for q in questions:
+        yield build_training_entry(q, build_answer_for_question(q, buckets, config), sheet_id, config.system_prompt)
+
+
+def generate_sheet_entries(sheet: dict, config: GenerationConfig, quotas: Optional[List[int]] = None) -> List[dict]:
+    """
+    All training entries for one factsheet. Runs in a worker process.
+    """
+    return list(iter_sheet_entries(sheet, config, quotas))
+
+
+def _sheet_job(job, config: GenerationConfig) -> List[dict]:
+    sheet, quotas = job
+    return generate_sheet_entries(sheet, config, quotas)
+
+
+def _iter_sheet_batches(config: GenerationConfig, jobs) -> Iterator[Iterable[dict]]:
+    if config.workers == 0:
+        for sheet, quotas in jobs:
+            yield iter_sheet_entries(sheet, config, quotas)
+        return
+    with ProcessPoolExecutor(max_workers=config.workers) as pool:
+        yield from pool.map(partial(_sheet_job, config=config), jobs)
+
+
+# -------------------------------------------------------------------
+# Output
+# -------------------------------------------------------------------
+
+class ShardedJsonlWriter:
+    """
+    Write JSON lines to `path`, or to `<stem>-00000<suffix>`, `<stem>-00001<suffix>`, ...
+    holding `shard_size` lines each when a shard size is given.
+    """
+
+    def __init__(self, path: Path, shard_size: Optional[int] = None):
+        self.path = Path(path)
+        self.shard_size = shard_size
+        self.paths: List[Path] = []
+        self.count = 0
+        self._f = None
+
+    def _shard_path(self, index: int) -> Path:
+        if not self.shard_size:
+            return self.path
+        return self.path.with_name(f"{self.path.stem}-{index:05d}{self.path.suffix}")
+
+    def write(self, entry: dict) -> None:
+        if self._f is None or (self.shard_size and self.count % self.shard_size == 0):
+            self._roll()
+        self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def _roll(self) -> None:
+        if self._f is not None:
+            self._f.close()
+        path = self._shard_path(len(self.paths))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = path.open("w", encoding="utf-8")
+        self.paths.append(path)
+
+    def close(self) -> None:
+        if self._f is None:
+            self._roll()  # always leave at least an (empty) output file
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run(config: GenerationConfig) -> int:
+    print(f"Loading factsheets from: {config.factsheet_file}")
+    sheets = iter_factsheets(config.factsheet_file)
+    if config.cross_product and config.target_size is not None:
+        jobs = zip(sheets, plan_quotas(config))
+    else:
+        jobs = ((sheet, None) for sheet in sheets)
+
+    num_sheets = 0
+    with ShardedJsonlWriter(config.output_path, config.shard_size) as writer:
+        for entries in _iter_sheet_batches(config, jobs):
+            num_sheets += 1
+            for entry in entries:
+                writer.write(entry)
+
+    print(f"Processed {num_sheets} factsheets.")
+    print(f"Generated {writer.count} Q&A training examples.")
+    print("Saved to: " + ", ".join(str(p) for p in writer.paths))
+    return writer.count
@@ -1,15 +1,21 @@
 import pandas as pd
+import argparse
 import json
 import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from bs4 import BeautifulSoup, MarkupResemblesLocatorWarning
+from lxml import etree
 from tqdm import tqdm
 import warnings
 
+from keyword_matcher import BEGINNER_KEYWORDS, KeywordMatcher
+
 # 🚫 Suppress unnecessary BeautifulSoup warnings
 warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
 
-print("⏳ Script started...")
-
 # 📁 Define paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
 base_dir = os.path.abspath(os.path.join(script_dir, ".."))
@@ -17,55 +23,224 @@ questions_path = os.path.join(base_dir, "raw", "Questions.csv")
 answers_path = os.path.join(base_dir, "raw", "Answers.csv")
 output_path = os.path.join(base_dir, "processed", "qa_dataset.jsonl")
 
-print("📂 Loading CSV files...")
-questions_df = pd.read_csv(questions_path, encoding="ISO-8859-1", usecols=["Id", "Title", "Body"])
-answers_df = pd.read_csv(answers_path, encoding="ISO-8859-1", usecols=["ParentId", "Body"])
-
-print(f"✅ Loaded {len(questions_df)} questions and {len(answers_df)} answers")
-
 # 🔍 Filter beginner-style questions
-beginner_keywords = [
-    "beginner", "basic", "starting", "first program", "how to", "new to", 
-    "simple", "explain", "understand", "easy", "introduction", "step by step"
-]
+beginner_keywords = BEGINNER_KEYWORDS
+
+BEGINNER_MATCHER = KeywordMatcher(beginner_keywords)
 
 def is_beginner_question(text):
-    text_lower = text.lower()
-    return any(keyword in text_lower for keyword in beginner_keywords)
-
-print("🔍 Filtering beginner questions...")
-
-filtered_questions = []
-for _, row in tqdm(questions_df.iterrows(), total=len(questions_df)):
-    title = BeautifulSoup(str(row.get("Title", "")), "lxml").get_text()
-    body = BeautifulSoup(str(row.get("Body", "")), "lxml").get_text()
-    if is_beginner_question(title) or is_beginner_question(body):
-        filtered_questions.append({
-            "Id": row["Id"],
-            "Title": title.strip(),
-            "Body": body.strip()
-        })
-
-print(f"✅ Found {len(filtered_questions)} beginner-style questions")
-
-# 🔗 Match answers
-answers_df["Body"] = answers_df["Body"].apply(lambda x: BeautifulSoup(str(x), "lxml").get_text().strip())
-
-qa_pairs = []
-for q in tqdm(filtered_questions, desc="🔗 Matching answers"):
-    matched_answers = answers_df[answers_df["ParentId"] == q["Id"]]
-    if not matched_answers.empty:
-        qa_pairs.append({
-            "question": f"{q['Title']} {q['Body']}",
-            "answer": matched_answers.iloc[0]["Body"]
-        })
-
-print(f"✅ Merged with answers: {len(qa_pairs)} Q&A pairs")
-
-# 💾 Save to JSONL
-print(f"💾 Saving to {output_path}...")
-with open(output_path, "w", encoding="utf-8") as f:
-    for pair in qa_pairs:
-        f.write(json.dumps(pair, ensure_ascii=False) + "\n")
-
-print(f"✅ Done! Saved {len(qa_pairs)} Q&A pairs to {output_path}")
+    return BEGINNER_MATCHER.matches(text)
+
+
+def keeps_question(title, body, required=None):
+    """Beginner filter; with `required`, only questions hitting one of those keywords are kept."""
+    if not required:
+        return is_beginner_question(title) or is_beginner_question(body)
+    hits = BEGINNER_MATCHER.find_all(title) + BEGINNER_MATCHER.find_all(body)
+    return any(k in required for k in hits)
+
+
+class _TextCollector:
+    """
+    lxml parser target that collects text the way BeautifulSoup's lxml builder + get_text() does:
+    consecutive data is merged, a whitespace-only run outside <pre>/<textarea> collapses to
+    "\n" (if it contains one) or " ", and script/style/template contents and comments are skipped.
+    """
+    ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+    SKIP = {"script", "style", "template"}
+    PRESERVE = {"pre", "textarea"}
+
+    def __init__(self):
+        self.parts = []
+        self.stack = []
+        self.pending = []
+
+    def _flush(self):
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending = []
+        if not text.strip(self.ASCII_SPACES) and not self.PRESERVE.intersection(self.stack):
+            text = "\n" if "\n" in text else " "
+        if not self.SKIP.intersection(self.stack):
+            self.parts.append(text)
+
+    def start(self, tag, attrib):
+        self._flush()
+        self.stack.append(tag)
+
+    def end(self, tag):
+        self._flush()
+        if self.stack:
+            self.stack.pop()
+
+    def data(self, text):
+        self.pending.append(text)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def doctype(self, *args):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return "".join(self.parts)
+
+
+def _is_plain_text(markup):
+    # No markup, no entities, no leading whitespace (the parser drops it) and nothing the parser
+    # rewrites: \r, NUL, other control characters and non-ASCII spaces all fail isprintable()
+    return (
+        "<" not in markup and "&" not in markup and markup[:1] not in ("", " ", "\t", "\n")
+        and markup.replace("\n", "").replace("\t", "").isprintable()
+    )
+
+
+def html_to_text(markup):
+    """Fast text extraction with lxml, same result as BeautifulSoup(markup, "lxml").get_text()."""
+    markup = str(markup)
+    if _is_plain_text(markup):
+        return markup
+    # Same parser and feed call as BeautifulSoup's lxml builder, without building a soup tree
+    parser = etree.HTMLParser(target=_TextCollector(), recover=True)
+    try:
+        parser.feed(markup)
+        return parser.close()
+    except (etree.ParserError, etree.XMLSyntaxError, ValueError):
+        return BeautifulSoup(markup, "lxml").get_text()
+
+
+def clean_question(row, required=None):
+    """Worker: strip HTML from (Id, Title, Body) and keep it only if it looks like a beginner question."""
+    q_id, title, body = row
+    title = html_to_text(title)
+    body = html_to_text(body)
+    if keeps_question(title, body, required):
+        return int(q_id), title.strip(), body.strip()
+    return None
+
+
+def clean_answer(row):
+    """Worker: strip HTML from an answer Body."""
+    parent_id, body = row
+    return int(parent_id), html_to_text(body).strip()
+
+
+def run_in_memory(required=None):
+    print("📂 Loading CSV files...")
+    questions_df = pd.read_csv(questions_path, encoding="ISO-8859-1", usecols=["Id", "Title", "Body"])
+    answers_df = pd.read_csv(answers_path, encoding="ISO-8859-1", usecols=["ParentId", "Body"])
+
+    print(f"✅ Loaded {len(questions_df)} questions and {len(answers_df)} answers")
+
+    print("🔍 Filtering beginner questions...")
+
+    filtered_questions = []
+    for _, row in tqdm(questions_df.iterrows(), total=len(questions_df)):
+        title = BeautifulSoup(str(row.get("Title", "")), "lxml").get_text()
+        body = BeautifulSoup(str(row.get("Body", "")), "lxml").get_text()
+        if keeps_question(title, body, required):
+            filtered_questions.append({
+                "Id": row["Id"],
+                "Title": title.strip(),
+                "Body": body.strip()
+            })
+
+    print(f"✅ Found {len(filtered_questions)} beginner-style questions")
+
+    # 🔗 Match answers: one hash join on ParentId instead of scanning Answers per question
+    kept_ids = {q["Id"] for q in filtered_questions}
+    first_answers = answers_df[answers_df["ParentId"].isin(kept_ids)].drop_duplicates("ParentId", keep="first")
+    answer_by_parent = dict(zip(first_answers["ParentId"], first_answers["Body"]))
+
+    qa_pairs = []
+    for q in tqdm(filtered_questions, desc="🔗 Matching answers"):
+        if q["Id"] in answer_by_parent:
+            qa_pairs.append({
+                "question": f"{q['Title']} {q['Body']}",
+                "answer": BeautifulSoup(str(answer_by_parent[q["Id"]]), "lxml").get_text().strip()
+            })
+
+    print(f"✅ Merged with answers: {len(qa_pairs)} Q&A pairs")
+
+    # 💾 Save to JSONL
+    print(f"💾 Saving to {output_path}...")
+    with open(output_path, "w", encoding="utf-8") as f:
+        for pair in qa_pairs:
+            f.write(json.dumps(pair, ensure_ascii=False) + "\n")
+
+    return len(qa_pairs)
+
+
+def run_streaming(chunksize=100_000, workers=None, required=None):
+    """
+    Chunked variant: questions are filtered before answers are touched, HTML is stripped in a
+    process pool, and intermediate rows are spilled to a temporary SQLite file. Peak memory is
+    one CSV chunk plus one integer id per kept question; output matches run_in_memory().
+    """
+    with tempfile.TemporaryDirectory() as tmp, ProcessPoolExecutor(max_workers=workers) as pool:
+        db = sqlite3.connect(os.path.join(tmp, "qa.sqlite"))
+        db.execute("CREATE TABLE questions (pos INTEGER PRIMARY KEY, id INTEGER, title TEXT, body TEXT)")
+        db.execute("CREATE TABLE answers (parent_id INTEGER PRIMARY KEY, body TEXT)")
+
+        print("🔍 Filtering beginner questions (streaming)...")
+        kept_ids = set()
+        reader = pd.read_csv(questions_path, encoding="ISO-8859-1", usecols=["Id", "Title", "Body"], chunksize=chunksize)
+        for chunk in tqdm(reader, desc="📂 Questions chunks"):
+            rows = zip(chunk["Id"], chunk["Title"], chunk["Body"])
+            kept = [q for q in pool.map(partial(clean_question, required=required), rows, chunksize=256) if q is not None]
+            db.executemany("INSERT INTO questions (id, title, body) VALUES (?, ?, ?)", kept)
+            kept_ids.update(q[0] for q in kept)
+        print(f"✅ Found {len(kept_ids)} beginner-style questions")
+
+        # Only the first answer of a kept question is ever stripped; INSERT OR IGNORE keeps file order
+        answered = set()
+        reader = pd.read_csv(answers_path, encoding="ISO-8859-1", usecols=["ParentId", "Body"], chunksize=chunksize)
+        for chunk in tqdm(reader, desc="🔗 Answers chunks"):
+            chunk = chunk[chunk["ParentId"].isin(kept_ids) & ~chunk["ParentId"].isin(answered)]
+            chunk = chunk.drop_duplicates("ParentId", keep="first")
+            if chunk.empty:
+                continue
+            rows = zip(chunk["ParentId"], chunk["Body"])
+            cleaned = list(pool.map(clean_answer, rows, chunksize=256))
+            db.executemany("INSERT OR IGNORE INTO answers (parent_id, body) VALUES (?, ?)", cleaned)
+            answered.update(a[0] for a in cleaned)
+        db.commit()
+
+        print(f"💾 Saving to {output_path}...")
+        n = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            query = "SELECT q.title, q.body, a.body FROM questions q JOIN answers a ON a.parent_id = q.id ORDER BY q.pos"
+            for title, body, answer in db.execute(query):
+                f.write(json.dumps({"question": f"{title} {body}", "answer": answer}, ensure_ascii=False) + "\n")
+                n += 1
+        db.close()
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract beginner-style Q&A pairs from the StackOverflow dump")
+    parser.add_argument("--stream", action="store_true", help="Chunked, multi-process mode for dumps that do not fit in memory")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="CSV rows per chunk in --stream mode")
+    parser.add_argument("--workers", type=int, default=None, help="HTML-stripping processes in --stream mode (default: all cores)")
+    parser.add_argument("--keyword", action="append", default=[], help="Only keep questions hitting this beginner keyword (can be repeated)")
+    args = parser.parse_args()
+    unknown = [k for k in args.keyword if k.lower() not in BEGINNER_MATCHER.keywords]
+    if unknown:
+        parser.error(f"not a beginner keyword: {', '.join(unknown)}")
+    required = frozenset(k.lower() for k in args.keyword) or None
+
+    print("⏳ Script started...")
+    if args.stream:
+        n = run_streaming(chunksize=args.chunksize, workers=args.workers, required=required)
+    else:
+        n = run_in_memory(required=required)
+    print(f"✅ Done! Saved {n} Q&A pairs to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
+import argparse
+import heapq
 import json
+import re
 from pathlib import Path
 
+from keyword_matcher import BEGINNER_KEYWORDS, KeywordMatcher
+from near_dedup import NearDuplicateIndex
+
 # Paths
 input_path = Path("../processed/qa_dataset.jsonl")  # Adjust if you move it
 output_path = Path("../processed/qa_dataset_top10k.jsonl")
@@ -11,14 +17,25 @@ MIN_A_LEN = 50
 MAX_Q_LEN = 300
 MAX_A_LEN = 1000
 
-seen_questions = set()
-filtered = []
+# Quality score weights
+W_ANSWER_LEN = 1.0   # scaled by len(answer) / MAX_A_LEN
+W_CODE = 1.0         # answer contains code
+W_KEYWORD = 0.25     # per distinct beginner keyword in the question, capped below
+MAX_KEYWORD_HITS = 4
+
+# HTML is already stripped, so look for fences, indented lines, calls and common statements
+CODE_HINT = re.compile(r"```|^(?: {4}|\t)\S|\b(?:def|import|return|print)\b|\w\(.*\)", re.M)
+KEYWORDS = KeywordMatcher(BEGINNER_KEYWORDS)
+
 
-print("📂 Filtering top 10,000 Q&A pairs...")
-with open(input_path, "r", encoding="utf-8") as infile:
-    for line in infile:
-        try:
-            item = json.loads(line)
+def iter_candidates(path):
+    """Stream (question, answer) pairs that pass the length and markup filters."""
+    with open(path, "r", encoding="utf-8") as infile:
+        for line in infile:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Skip corrupted lines
             q = item.get("question", "").strip()
             a = item.get("answer", "").strip()
 
@@ -32,22 +49,99 @@ with open(input_path, "r", encoding="utf-8") as infile:
             if "<" in a or ">" in a:
                 continue
 
-            # Skip duplicates
-            if q.lower() in seen_questions:
+            yield q, a
+
+
+def quality_score(q, a):
+    """Combine answer length, code presence and beginner keyword hits into one score."""
+    score = W_ANSWER_LEN * min(len(a), MAX_A_LEN) / MAX_A_LEN
+    if CODE_HINT.search(a):
+        score += W_CODE
+    score += W_KEYWORD * min(len(KEYWORDS.find_all(q)), MAX_KEYWORD_HITS)
+    return score
+
+
+def select_top_k(pairs, k, dedup):
+    """
+    Keep the k best-scoring pairs from a stream in a bounded min-heap.
+
+    Ranks are (score, -position), so ties go to the earlier pair and the result is deterministic.
+    The near-duplicate index only holds heap members: a near-duplicate replaces them only if it
+    ranks higher. Returns (pairs sorted best first, near-duplicates skipped).
+    """
+    heap = []    # (score, -pos) min-heap; may hold stale entries of replaced pairs
+    alive = {}   # pos -> (score, q, a)
+    n_dupes = 0
+
+    def evict(pos):
+        del alive[pos]
+        dedup.remove(pos)
+
+    for pos, (q, a) in enumerate(pairs):
+        score = quality_score(q, a)
+        rank = (score, -pos)
+        while heap and -heap[0][1] not in alive:
+            heapq.heappop(heap)
+        if len(alive) >= k and rank <= heap[0]:
+            continue
+        sig = dedup.signature(q)
+        dupes = dedup.query(sig)
+        if dupes:
+            if any((alive[d][0], -d) >= rank for d in dupes):
+                n_dupes += 1
                 continue
+            n_dupes += len(dupes)
+            for d in dupes:
+                evict(d)
+        alive[pos] = (score, q, a)
+        dedup.add(sig, pos)
+        heapq.heappush(heap, rank)
+        while len(alive) > k:
+            _, neg_pos = heapq.heappop(heap)
+            if -neg_pos in alive:
+                evict(-neg_pos)
+        if len(heap) > 2 * k:
+            heap = [(alive[p][0], -p) for p in alive]
+            heapq.heapify(heap)
 
-            seen_questions.add(q.lower())
-            filtered.append({"question": q, "answer": a})
+    best = sorted(alive.items(), key=lambda item: (-item[1][0], item[0]))
+    return [{"question": q, "answer": a} for _, (_, q, a) in best], n_dupes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter the top Q&A pairs with near-duplicate removal")
+    parser.add_argument("--limit", type=int, default=10_000)
+    parser.add_argument("--threshold", type=float, default=0.8, help="Estimated Jaccard similarity above which questions count as duplicates")
+    parser.add_argument("--num-perm", type=int, default=128, help="MinHash permutations per signature")
+    parser.add_argument("--first-n", action="store_true", help="Keep the first pairs in file order instead of the best-scoring ones")
+    args = parser.parse_args()
 
-            if len(filtered) >= 10_000:
+    # Skip near-duplicates (exact duplicates included) with MinHash + LSH
+    dedup = NearDuplicateIndex(threshold=args.threshold, num_perm=args.num_perm)
+
+    if args.first_n:
+        filtered = []
+        n_dupes = 0
+        print(f"📂 Filtering first {args.limit:,} Q&A pairs...")
+        for q, a in iter_candidates(input_path):
+            if not dedup.add_if_new(q):
+                n_dupes += 1
+                continue
+            filtered.append({"question": q, "answer": a})
+            if len(filtered) >= args.limit:
                 break
+    else:
+        print(f"📂 Ranking top {args.limit:,} Q&A pairs by quality score...")
+        filtered, n_dupes = select_top_k(iter_candidates(input_path), args.limit, dedup)
+
+    # Save
+    with open(output_path, "w", encoding="utf-8") as outfile:
+        for item in filtered:
+            outfile.write(json.dumps(item) + "\n")
 
-        except json.JSONDecodeError:
-            continue  # Skip corrupted lines
+    print(f"🧹 Skipped {n_dupes} near-duplicate questions (threshold={args.threshold}, bands={dedup.bands}x{dedup.rows})")
+    print(f"✅ Saved {len(filtered)} filtered Q&A pairs to {output_path}")
 
-# Save
-with open(output_path, "w", encoding="utf-8") as outfile:
-    for item in filtered:
-        outfile.write(json.dumps(item) + "\n")
 
-print(f"✅ Saved {len(filtered)} filtered Q&A pairs to {output_path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import re
+
+
+# Phrases that mark beginner-style StackOverflow questions
+BEGINNER_KEYWORDS = [
+    "beginner", "basic", "starting", "first program", "how to", "new to",
+    "simple", "explain", "understand", "easy", "introduction", "step by step"
+]
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive substring matcher for many keywords at once.
+
+    All keywords are compiled into one alternation, so a text is scanned once no matter how
+    long the keyword list grows. `find_all` reports every keyword that occurs, including ones
+    overlapping or nested inside a longer hit.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(k.lower() for k in keywords if k))
+        # Longest first, so the alternation prefers the longest keyword at a given position
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        alternation = "|".join(re.escape(k) for k in ordered) or r"(?!)"
+        self._pattern = re.compile(alternation)
+        # Zero-width lookahead visits every start position, giving overlapping hits in one pass
+        self._overlapping = re.compile(f"(?=({alternation}))")
+        # Keywords that are prefixes of a hit start at the same position and are implied by it
+        self._implied = {k: [p for p in ordered if k.startswith(p)] for k in ordered}
+
+    def search(self, text):
+        """Return the leftmost keyword found in text, or None."""
+        m = self._pattern.search(text.lower())
+        return m.group(0) if m else None
+
+    def matches(self, text):
+        return self._pattern.search(text.lower()) is not None
+
+    def find_all(self, text):
+        """Return every distinct keyword occurring in text, in order of first occurrence."""
+        hits = {}
+        for m in self._overlapping.finditer(text.lower()):
+            for k in self._implied[m.group(1)]:
+                hits.setdefault(k, None)
+        return list(hits)
@@ -0,0 +1,99 @@
+import re
+import zlib
+
+import numpy as np
+
+
+_PRIME = (1 << 31) - 1
+_TOKEN = re.compile(r"\w+")
+
+
+def shingles(text, size=3):
+    """Hashed word n-grams of lower-cased text (31-bit ints)."""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < size:
+        grams = [" ".join(tokens) or text.lower()]
+    else:
+        grams = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) & _PRIME for g in set(grams)), dtype=np.uint64)
+
+
+def lsh_params(threshold, num_perm):
+    """
+    Pick (bands, rows) so the LSH S-curve threshold (1/bands) ** (1/rows) lands closest to
+    the requested Jaccard similarity.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        err = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or err < best[0]:
+            best = (err, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate filter using MinHash signatures and LSH banding.
+
+    Each indexed text costs one signature plus one bucket entry per band; LSH candidates are
+    confirmed by their estimated Jaccard similarity, so no pairwise comparison is ever made.
+    Entries can be removed again, which lets callers keep the index as small as their output.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=3, seed=1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)[:, None]
+        self._b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)[:, None]
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._signatures = {}
+        self._next_key = 0
+
+    def signature(self, text):
+        x = shingles(text, self.shingle_size)[None, :]
+        return ((self._a * x + self._b) % _PRIME).min(axis=1)
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def query(self, sig):
+        """Keys of indexed entries whose estimated similarity to `sig` reaches the threshold."""
+        found = []
+        checked = set()
+        for band, bkey in zip(self._buckets, self._band_keys(sig)):
+            for key in band.get(bkey, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                if np.mean(self._signatures[key] == sig) >= self.threshold:
+                    found.append(key)
+        return found
+
+    def add(self, sig, key):
+        self._signatures[key] = sig
+        for band, bkey in zip(self._buckets, self._band_keys(sig)):
+            band.setdefault(bkey, set()).add(key)
+
+    def remove(self, key):
+        sig = self._signatures.pop(key)
+        for band, bkey in zip(self._buckets, self._band_keys(sig)):
+            bucket = band[bkey]
+            bucket.discard(key)
+            if not bucket:
+                del band[bkey]
+
+    def add_if_new(self, text):
+        """Index text and return True, or return False if a near-duplicate is already indexed."""
+        sig = self.signature(text)
+        if self.query(sig):
+            return False
+        self.add(sig, self._next_key)
+        self._next_key += 1
+        return True
+
+    def __len__(self):
+        return len(self._signatures)
@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, BinaryIO, Optional
+
+
+# Layout under the raw root:
+#   blobs/<first two hex chars>/<sha256>.gz   gzip-compressed content, written once
+#   manifest.jsonl                            one line per save: source, fetched_at, sha256, ...
+#   latest.json                               latest manifest entry per source, and how many
+#                                             manifest bytes it covers (rebuilt from the manifest)
+BLOB_SUBDIR = "blobs"
+MANIFEST_NAME = "manifest.jsonl"
+LATEST_NAME = "latest.json"
+
+
+def blob_path(root: Path, digest: str) -> Path:
+	return root / BLOB_SUBDIR / digest[:2] / f"{digest}.gz"
+
+
+def put_blob(root: Path, content: bytes) -> str:
+	"""
+	Store content under its sha256 and return the digest. Identical content is stored once.
+	"""
+	digest = hashlib.sha256(content).hexdigest()
+	path = blob_path(root, digest)
+	if path.exists():
+		return digest
+	path.parent.mkdir(parents=True, exist_ok=True)
+	tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+	with gzip.open(tmp, "wb") as f:
+		f.write(content)
+	os.replace(tmp, path)
+	return digest
+
+
+def has_blob(root: Path, digest: Optional[str]) -> bool:
+	return bool(digest) and blob_path(root, digest).exists()
+
+
+def read_blob(root: Path, digest: str) -> bytes:
+	with gzip.open(blob_path(root, digest), "rb") as f:
+		return f.read()
+
+
+def open_blob(root: Path, digest: str) -> BinaryIO:
+	"""
+	Open a blob for streaming reads; content is decompressed on the fly.
+	"""
+	return gzip.open(blob_path(root, digest), "rb")
+
+
+def _latest_index(root: Path) -> Dict[str, Any]:
+	"""
+	The per-source latest index, first caught up with any manifest lines it does not cover yet
+	(only those are read). A missing, unreadable or outdated index is rebuilt from the manifest.
+	"""
+	index: Dict[str, Any] = {"manifest_bytes": 0, "sources": {}}
+	try:
+		with open(root / LATEST_NAME, "r", encoding="utf-8") as f:
+			index = json.load(f)
+	except (OSError, ValueError):
+		pass
+	manifest = root / MANIFEST_NAME
+	size = manifest.stat().st_size if manifest.exists() else 0
+	if size < index["manifest_bytes"]:
+		index = {"manifest_bytes": 0, "sources": {}}
+	if size == index["manifest_bytes"]:
+		return index
+	with open(manifest, "rb") as f:
+		f.seek(index["manifest_bytes"])
+		for line in f:
+			if not line.endswith(b"\n"):
+				break  # append still in progress
+			index["manifest_bytes"] += len(line)
+			try:
+				entry = json.loads(line) if line.strip() else {}
+			except ValueError:
+				continue  # a torn append
+			if entry.get("source") is not None:
+				index["sources"][entry["source"]] = entry
+	tmp = root / f"{LATEST_NAME}.{os.getpid()}.tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(index, f, ensure_ascii=False)
+	os.replace(tmp, root / LATEST_NAME)
+	return index
+
+
+def append_manifest(root: Path, entry: Dict[str, Any]) -> None:
+	root.mkdir(parents=True, exist_ok=True)
+	with open(root / MANIFEST_NAME, "ab+") as f:
+		line = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+		if f.tell():
+			f.seek(-1, os.SEEK_END)
+			if f.read(1) != b"\n":
+				line = b"\n" + line  # end a torn append so this entry stays parseable
+		f.write(line)
+	_latest_index(root)
+
+
+def latest_entry(root: Path, source: str) -> Optional[Dict[str, Any]]:
+	"""
+	The most recent manifest entry for a source URL (later lines win), or None.
+	Served from the latest index, so lookups do not rescan the manifest.
+	"""
+	return _latest_index(root)["sources"].get(source)
+
+
+def latest_digest(root: Path, source: str) -> Optional[str]:
+	"""
+	Blob hash of the latest stored snapshot of `source`, or None if it was never stored.
+	"""
+	entry = latest_entry(root, source)
+	if entry is None or not has_blob(root, entry.get("sha256")):
+		return None
+	return entry["sha256"]
+
+
+def read_latest(root: Path, source: str) -> Optional[bytes]:
+	"""
+	Content of the latest snapshot of `source`, or None if it was never stored.
+	"""
+	digest = latest_digest(root, source)
+	return read_blob(root, digest) if digest else None
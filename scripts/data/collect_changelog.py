@@ -2,7 +2,7 @@ import re
 from pathlib import Path
 from typing import List
 
-from .common import fetch_url, save_with_metadata, RAW_DIR, ensure_dir
+from .common import refresh_snapshots, RAW_DIR
 
 
 BASE_URLS = [
@@ -14,21 +14,15 @@ BASE_URLS = [
 def target_paths_for(url: str) -> Path:
 	parts = url.split("/")
 	version = parts[3] if len(parts) > 3 else "unknown"
-	out_dir = RAW_DIR / "changelogs" / version
-	ensure_dir(out_dir)
-	filename = "changelog.html"
-	return out_dir / filename
+	# Names the snapshot; only its .meta.json sidecar is written next to it
+	return RAW_DIR / "changelogs" / version / "changelog.html"
 
 
 def collect() -> List[Path]:
-	saved: List[Path] = []
-	for url in BASE_URLS:
-		resp = fetch_url(url)
-		raw_path = target_paths_for(url)
-		meta_path = raw_path.with_suffix(".meta.json")
-		save_with_metadata(raw_path, meta_path, url, resp.content, extra_meta={"content_type": resp.headers.get("Content-Type", "")})
-		saved.append(raw_path)
-	return saved
+	"""
+	Refresh the changelog snapshots; returns the blob paths holding their current content.
+	"""
+	return refresh_snapshots((url, target_paths_for(url)) for url in BASE_URLS)
 
 
 if __name__ == "__main__":
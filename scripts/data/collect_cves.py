@@ -1,16 +1,22 @@
+import argparse
+import json
 import os
 import time
+import datetime as dt
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 import re
 
-import requests
-
-from .common import RAW_DIR, ensure_dir, write_json, utc_now_iso
+from .common import RAW_DIR, ensure_dir, write_json, read_meta, utc_now_iso, shared_engine
 
 
 NVD_API = "https://services.nvd.nist.gov/rest/json/cves/2.0"
 OUT_DIR = RAW_DIR / "cves"
+STORE_DIR = OUT_DIR / "by_id"
+CURSOR_PATH = OUT_DIR / "sync_cursor.json"
+PAGE_SIZE = 200
+# NVD rejects lastModStartDate/lastModEndDate ranges longer than 120 days
+MAX_WINDOW = dt.timedelta(days=120)
 
 
 def _headers() -> Dict[str, str]:
@@ -33,31 +39,46 @@ def _with_utc_z(dt_str: str) -> str:
 	return f"{dt_str}Z"
 
 
-def fetch_all(keyword: str = "CPython", start: str = "2024-01-01T00:00:00.000", end: str = "2025-12-31T23:59:59.999") -> Dict[str, Any]:
+def _page_delay() -> float:
 	"""
-	Fetch CVEs from NVD using keyword search bounded by publication dates.
+	Pause between pages: NVD allows 50 requests/30s with an API key and 5 without.
+	"""
+	return 0.6 if os.getenv("NVD_API_KEY") else 6.0
+
+
+def _nvd_ts(moment: dt.datetime) -> str:
+	return moment.astimezone(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def iter_pages(params: Dict[str, Any], page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+	"""
+	Yield raw NVD result pages for a query one at a time, so callers never hold the full result set.
 	"""
-	results: List[Dict[str, Any]] = []
 	start_index = 0
-	page_size = 200
 	while True:
-		params = {
-			"keywordSearch": keyword,
-			"pubStartDate": _with_utc_z(start),
-			"pubEndDate": _with_utc_z(end),
-			"startIndex": start_index,
-			"resultsPerPage": page_size,
-		}
-		resp = requests.get(NVD_API, headers=_headers(), params=params, timeout=60)
-		resp.raise_for_status()
-		data = resp.json()
+		page_params = dict(params, startIndex=start_index, resultsPerPage=page_size)
+		data = shared_engine().fetch(NVD_API, headers=_headers(), params=page_params).json()
 		page_items = data.get("vulnerabilities", [])
-		results.extend(page_items)
-		total = int(data.get("totalResults", len(results)))
+		yield data
+		total = int(data.get("totalResults", 0))
 		start_index += len(page_items)
 		if start_index >= total or not page_items:
 			break
-		time.sleep(0.6)
+		time.sleep(_page_delay())
+
+
+def fetch_all(keyword: str = "CPython", start: str = "2024-01-01T00:00:00.000", end: str = "2025-12-31T23:59:59.999") -> Dict[str, Any]:
+	"""
+	Fetch CVEs from NVD using keyword search bounded by publication dates.
+	"""
+	results: List[Dict[str, Any]] = []
+	params = {
+		"keywordSearch": keyword,
+		"pubStartDate": _with_utc_z(start),
+		"pubEndDate": _with_utc_z(end),
+	}
+	for page in iter_pages(params):
+		results.extend(page.get("vulnerabilities", []))
 	return {
 		"fetched_at": utc_now_iso(),
 		"keyword": keyword,
@@ -68,6 +89,67 @@ def fetch_all(keyword: str = "CPython", start: str = "2024-01-01T00:00:00.000",
 	}
 
 
+def store_page(page: Dict[str, Any]) -> int:
+	"""
+	Merge one result page into the on-disk store (one JSON file per CVE id, newest record wins).
+	"""
+	ensure_dir(STORE_DIR)
+	n = 0
+	for item in page.get("vulnerabilities", []):
+		cve_id = item.get("cve", {}).get("id")
+		if not cve_id:
+			continue
+		write_json(STORE_DIR / f"{cve_id}.json", item)
+		n += 1
+	return n
+
+
+def _save_cursor(keyword: str, moment: dt.datetime) -> None:
+	cursors = read_meta(CURSOR_PATH)
+	cursors[keyword] = _nvd_ts(moment)
+	write_json(CURSOR_PATH, cursors)
+
+
+def sync(keyword: str = "CPython", now: Optional[dt.datetime] = None) -> Dict[str, Any]:
+	"""
+	Incrementally sync CVEs matching `keyword` into STORE_DIR.
+
+	The first run pulls the full keyword history; later runs only ask for records whose
+	lastModified falls after the stored cursor, split into windows NVD accepts. Pages are
+	written to disk as they arrive and the cursor advances after each completed window.
+	"""
+	now = now or dt.datetime.now(dt.timezone.utc)
+	cursor = read_meta(CURSOR_PATH).get(keyword)
+	requests_made = 0
+	stored = 0
+	if cursor is None:
+		for page in iter_pages({"keywordSearch": keyword}):
+			requests_made += 1
+			stored += store_page(page)
+		_save_cursor(keyword, now)
+	else:
+		window_start = dt.datetime.strptime(cursor, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=dt.timezone.utc)
+		while window_start < now:
+			window_end = min(window_start + MAX_WINDOW, now)
+			params = {
+				"keywordSearch": keyword,
+				"lastModStartDate": _nvd_ts(window_start),
+				"lastModEndDate": _nvd_ts(window_end),
+			}
+			for page in iter_pages(params):
+				requests_made += 1
+				stored += store_page(page)
+			_save_cursor(keyword, window_end)
+			window_start = window_end
+	return {
+		"synced_at": utc_now_iso(),
+		"keyword": keyword,
+		"previous_cursor": cursor,
+		"requests": requests_made,
+		"stored": stored,
+	}
+
+
 def save_snapshot(obj: Dict[str, Any], filename: str = "nvd_cpython_2024_2025.json") -> Path:
 	ensure_dir(OUT_DIR)
 	out_path = OUT_DIR / filename
@@ -75,9 +157,20 @@ def save_snapshot(obj: Dict[str, Any], filename: str = "nvd_cpython_2024_2025.js
 	return out_path
 
 
-if __name__ == "__main__":
-	data = fetch_all()
+def main():
+	parser = argparse.ArgumentParser(description="Collect CPython CVEs from NVD into data/raw/cves")
+	parser.add_argument("--sync", action="store_true", help="Incremental lastModified sync into data/raw/cves/by_id")
+	parser.add_argument("--keyword", default="CPython")
+	args = parser.parse_args()
+	if args.sync:
+		print(json.dumps(sync(args.keyword)))
+		return
+	data = fetch_all(args.keyword)
 	path = save_snapshot(data)
 	print(str(path))
 
 
+if __name__ == "__main__":
+	main()
+
+
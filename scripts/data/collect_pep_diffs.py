@@ -3,7 +3,7 @@ import itertools
 from pathlib import Path
 from typing import List
 
-from .common import fetch_url, save_with_metadata, RAW_DIR, ensure_dir
+from .common import refresh_snapshots, RAW_DIR
 
 
 BASE_PEP_URL = "https://peps.python.org"
@@ -15,16 +15,11 @@ def pep_url(pep_id: int) -> str:
 
 
 def collect_peps(pep_ids: List[int]) -> List[Path]:
-	ensure_dir(OUT_DIR)
-	saved: List[Path] = []
-	for pid in pep_ids:
-		url = pep_url(pid)
-		resp = fetch_url(url)
-		raw_path = OUT_DIR / f"pep-{pid:04d}.html"
-		meta_path = raw_path.with_suffix(".meta.json")
-		save_with_metadata(raw_path, meta_path, url, resp.content, extra_meta={"content_type": resp.headers.get("Content-Type", "")})
-		saved.append(raw_path)
-	return saved
+	"""
+	Refresh the given PEP snapshots; returns the blob paths holding their current content.
+	"""
+	# Fetches run concurrently on the shared engine; unchanged pages answer 304 and are skipped
+	return refresh_snapshots((pep_url(pid), OUT_DIR / f"pep-{pid:04d}.html") for pid in pep_ids)
 
 
 def main():
@@ -34,9 +29,7 @@ def main():
 	pep_ids = args.pep or []
 	if not pep_ids:
 		# Fallback: cache index and a small seed set often relevant in recent cycles
-		index = fetch_url(BASE_PEP_URL + "/")
-		index_path = OUT_DIR / "index.html"
-		save_with_metadata(index_path, index_path.with_suffix(".meta.json"), BASE_PEP_URL + "/", index.content, extra_meta={"content_type": index.headers.get("Content-Type", "")})
+		refresh_snapshots([(BASE_PEP_URL + "/", OUT_DIR / "index.html")])
 		pep_ids = [703, 719, 723, 727, 738, 739]  # seed; adjustable later
 	collect_peps(pep_ids)
 
@@ -1,10 +1,14 @@
+import argparse
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 
 import requests
 
-from .common import RAW_DIR, ensure_dir, write_json, utc_now_iso
+from .common import RAW_DIR, ensure_dir, write_json, utc_now_iso, shared_engine
 
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN") or os.getenv("GH_TOKEN")
@@ -20,24 +24,106 @@ def gh_headers() -> Dict[str, str]:
 	return h
 
 
+class RateLimitScheduler:
+	"""
+	Hold requests back until the rate-limit window resets instead of letting them fail.
+
+	Tracks X-RateLimit-Remaining / X-RateLimit-Reset from every response and reserves one unit
+	per dispatched request, so concurrent workers cannot overshoot the remaining budget.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.remaining: Optional[int] = None
+		self.reset_at = 0.0
+
+	def wait(self) -> None:
+		with self._lock:
+			if self.remaining is not None and self.remaining <= 0:
+				delay = self.reset_at - time.time()
+				if delay > 0:
+					# Sleeping under the lock parks every worker until the window resets
+					time.sleep(delay + 1.0)
+				self.remaining = None
+			if self.remaining is not None:
+				self.remaining -= 1
+
+	def update(self, headers: Any) -> None:
+		remaining = headers.get("X-RateLimit-Remaining")
+		reset = headers.get("X-RateLimit-Reset")
+		if remaining is None or reset is None:
+			return
+		with self._lock:
+			self.remaining = int(remaining)
+			self.reset_at = float(reset)
+
+
+_SCHEDULER = RateLimitScheduler()
+
+
+def gh_get(url: str, params: Optional[Dict[str, Any]] = None, scheduler: RateLimitScheduler = _SCHEDULER) -> requests.Response:
+	"""
+	GET a GitHub API URL, waiting out exhausted rate-limit windows rather than failing.
+	"""
+	while True:
+		scheduler.wait()
+		try:
+			resp = shared_engine().fetch(url, headers=gh_headers(), params=params)
+		except requests.HTTPError as exc:
+			r = exc.response
+			if r is not None and r.status_code in (403, 429) and r.headers.get("X-RateLimit-Remaining") == "0":
+				scheduler.update(r.headers)
+				continue
+			raise
+		scheduler.update(resp.headers)
+		return resp
+
+
+def iter_pages(url: str, params: Optional[Dict[str, Any]] = None) -> Iterator[requests.Response]:
+	"""
+	Follow `Link: rel="next"` headers, yielding each page response in order.
+	"""
+	next_url: Optional[str] = url
+	while next_url:
+		resp = gh_get(next_url, params=params)
+		yield resp
+		next_url = resp.links.get("next", {}).get("url")
+		params = None  # the next link already carries the query
+
+
 def search_release_blockers(milestone: str) -> Dict[str, Any]:
 	"""
 	Use the GitHub search API to find issues with label release-blocker for a milestone title.
+	All result pages are followed, so milestones with more than 100 blockers are complete.
 	"""
 	q = f"repo:{REPO} label:release-blocker milestone:{milestone} is:issue"
 	params = {"q": q, "per_page": 100}
-	resp = requests.get(f"{GH_API}/search/issues", headers=gh_headers(), params=params, timeout=60)
-	resp.raise_for_status()
-	data = resp.json()
+	items: List[Dict[str, Any]] = []
+	total_count = 0
+	for resp in iter_pages(f"{GH_API}/search/issues", params):
+		data = resp.json()
+		total_count = data.get("total_count", total_count)
+		items.extend(data.get("items", []))
 	return {
 		"fetched_at": utc_now_iso(),
 		"repository": REPO,
 		"milestone": milestone,
-		"total_count": data.get("total_count", 0),
-		"items": data.get("items", []),
+		"total_count": total_count,
+		"items": items,
 	}
 
 
+def list_milestones(prefix: str = "3.") -> List[str]:
+	"""
+	Titles of all (open and closed) repository milestones starting with `prefix`.
+	"""
+	titles: List[str] = []
+	params = {"state": "all", "per_page": 100}
+	for resp in iter_pages(f"{GH_API}/repos/{REPO}/milestones", params):
+		titles.extend(m["title"] for m in resp.json() if m.get("title", "").startswith(prefix))
+	return titles
+
+
 def save_snapshot(obj: Dict[str, Any], milestone: str) -> Path:
 	ensure_dir(OUT_DIR)
 	out_path = OUT_DIR / f"release_blockers_{milestone.replace('.', '_')}.json"
@@ -45,10 +131,31 @@ def save_snapshot(obj: Dict[str, Any], milestone: str) -> Path:
 	return out_path
 
 
-if __name__ == "__main__":
-	for ms in ["3.13.1", "3.13.2"]:
-		data = search_release_blockers(ms)
-		path = save_snapshot(data, ms)
+def collect_many(milestones: List[str], workers: int = 4) -> List[Path]:
+	"""
+	Snapshot several milestones concurrently; pages within one milestone stay sequential.
+	"""
+	def _one(ms: str) -> Path:
+		return save_snapshot(search_release_blockers(ms), ms)
+
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		return list(pool.map(_one, milestones))
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Snapshot CPython release blockers to data/raw/github")
+	parser.add_argument("--milestone", action="append", default=[], help="Milestone title (can be repeated)")
+	parser.add_argument("--all", action="store_true", help="Snapshot every 3.x milestone")
+	parser.add_argument("--workers", type=int, default=4)
+	args = parser.parse_args()
+	milestones = list(args.milestone)
+	if args.all:
+		milestones.extend(ms for ms in list_milestones("3.") if ms not in milestones)
+	if not milestones:
+		milestones = ["3.13.1", "3.13.2"]
+	for path in collect_many(milestones, workers=args.workers):
 		print(str(path))
 
 
+if __name__ == "__main__":
+	main()
@@ -1,15 +1,18 @@
 import os
 import json
-import time
 import datetime as dt
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, BinaryIO, Iterable, List, Optional, Tuple
 
 import requests
 
+from .blobstore import blob_path, put_blob, has_blob, append_manifest, latest_entry, latest_digest, open_blob, read_latest
+from .fetcher import FetchEngine, get_engine
+
 
 DEFAULT_UA = "research-dataset-builder/1.0 (+https://example.org)"
 RAW_DIR = Path("data") / "raw"
+NOT_MODIFIED = 304
 
 
 def ensure_dir(path: Path) -> None:
@@ -23,32 +26,19 @@ def utc_now_iso() -> str:
 	return dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
 
+def shared_engine() -> FetchEngine:
+	"""
+	The pooled fetch engine shared by all collectors in this package.
+	"""
+	return get_engine(headers={"User-Agent": DEFAULT_UA})
+
+
 def fetch_url(url: str, headers: Optional[Dict[str, str]] = None, retry: int = 2, sleep_seconds: float = 1.0) -> requests.Response:
 	"""
-	Fetch a URL with a simple retry. Caller is responsible for response.content handling.
-	"""
-	h = {"User-Agent": DEFAULT_UA}
-	if headers:
-		h.update(headers)
-	last_exc: Optional[Exception] = None
-	for attempt in range(retry + 1):
-		try:
-			resp = requests.get(url, headers=h, timeout=60)
-			resp.raise_for_status()
-			return resp
-		except Exception as exc:
-			last_exc = exc
-			if attempt < retry:
-				time.sleep(sleep_seconds)
-			else:
-				raise
-	raise last_exc  # pragma: no cover
-
-
-def write_raw_blob(path: Path, blob: bytes) -> None:
-	ensure_dir(path.parent)
-	with open(path, "wb") as f:
-		f.write(blob)
+	Fetch a URL through the shared engine (pooled connections, per-host limit, jittered backoff).
+	Synchronous; `sleep_seconds` is the backoff base. Caller is responsible for response.content handling.
+	"""
+	return shared_engine().fetch(url, headers=headers, retry=retry, backoff_base=sleep_seconds)
 
 
 def write_json(path: Path, obj: Any) -> None:
@@ -57,18 +47,115 @@ def write_json(path: Path, obj: Any) -> None:
 		json.dump(obj, f, ensure_ascii=False, indent=2)
 
 
-def save_with_metadata(raw_path: Path, meta_path: Path, source_url: str, content: bytes, extra_meta: Optional[Dict[str, Any]] = None) -> None:
+def save_with_metadata(raw_path: Path, meta_path: Path, source_url: str, content: bytes, extra_meta: Optional[Dict[str, Any]] = None) -> Path:
 	"""
-	Save raw content and sidecar metadata JSON with fetch timestamp and source URL.
+	Save raw content to the content-addressed store and write sidecar metadata JSON with
+	fetch timestamp, source URL and blob hash. Each new snapshot is also recorded in the
+	manifest; refetching identical content only refreshes the sidecar (validators included).
+	Nothing is written at `raw_path`, it only names the snapshot in the manifest; returns the
+	path of the gzip blob holding the content (readers can also use `load_latest`).
 	"""
-	write_raw_blob(raw_path, content)
+	digest = put_blob(RAW_DIR, content)
 	meta: Dict[str, Any] = {
 		"source": source_url,
 		"fetched_at": utc_now_iso(),
 		"size_bytes": len(content),
+		"sha256": digest,
 	}
 	if extra_meta:
 		meta.update(extra_meta)
+	latest = latest_entry(RAW_DIR, source_url)
+	if latest is None or latest.get("sha256") != digest or latest.get("path") != raw_path.as_posix():
+		append_manifest(RAW_DIR, {
+			"source": source_url,
+			"fetched_at": meta["fetched_at"],
+			"sha256": digest,
+			"size_bytes": len(content),
+			"path": raw_path.as_posix(),
+		})
 	write_json(meta_path, meta)
+	return blob_path(RAW_DIR, digest)
+
 
+def load_latest(source_url: str) -> Optional[bytes]:
+	"""
+	Latest stored snapshot of a source URL according to the manifest, or None.
+	"""
+	return read_latest(RAW_DIR, source_url)
+
+
+def latest_source_digest(source_url: str) -> Optional[str]:
+	"""
+	Blob hash of the latest stored snapshot of a source URL, or None.
+	"""
+	return latest_digest(RAW_DIR, source_url)
 
+
+def open_latest(source_url: str) -> Optional[BinaryIO]:
+	"""
+	Streaming handle on the latest stored snapshot of a source URL, or None.
+	"""
+	digest = latest_digest(RAW_DIR, source_url)
+	return open_blob(RAW_DIR, digest) if digest else None
+
+
+def read_meta(meta_path: Path) -> Dict[str, Any]:
+	"""
+	Load a `.meta.json` sidecar, or an empty dict if it is missing or unreadable.
+	"""
+	try:
+		with open(meta_path, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def conditional_headers(raw_path: Path, meta_path: Path) -> Dict[str, str]:
+	"""
+	Build If-None-Match / If-Modified-Since headers from the validators stored in a sidecar.
+	Nothing is sent when the snapshot is missing, so a 304 can never leave us without content.
+	"""
+	meta = read_meta(meta_path)
+	if not has_blob(RAW_DIR, meta.get("sha256")) and not raw_path.exists():
+		return {}
+	h: Dict[str, str] = {}
+	if meta.get("etag"):
+		h["If-None-Match"] = meta["etag"]
+	if meta.get("last_modified"):
+		h["If-Modified-Since"] = meta["last_modified"]
+	return h
+
+
+def response_meta(resp: requests.Response) -> Dict[str, Any]:
+	"""
+	Sidecar fields taken from a response: content type plus the ETag/Last-Modified validators.
+	"""
+	meta: Dict[str, Any] = {"content_type": resp.headers.get("Content-Type", "")}
+	if resp.headers.get("ETag"):
+		meta["etag"] = resp.headers["ETag"]
+	if resp.headers.get("Last-Modified"):
+		meta["last_modified"] = resp.headers["Last-Modified"]
+	return meta
+
+
+def refresh_snapshots(targets: Iterable[Tuple[str, Path]]) -> List[Path]:
+	"""
+	Conditionally fetch each (url, raw_path) concurrently and save changed pages with their sidecar.
+	Pages answering 304 Not Modified are neither downloaded nor rewritten. Returns, per target,
+	the blob holding its current content (a legacy file at raw_path if it predates the store).
+	"""
+	engine = shared_engine()
+	jobs = []
+	for url, raw_path in targets:
+		meta_path = raw_path.with_suffix(".meta.json")
+		jobs.append((url, raw_path, meta_path, engine.submit(url, headers=conditional_headers(raw_path, meta_path))))
+	saved: List[Path] = []
+	for url, raw_path, meta_path, fut in jobs:
+		resp = fut.result()
+		if resp.status_code != NOT_MODIFIED:
+			saved.append(save_with_metadata(raw_path, meta_path, url, resp.content, extra_meta=response_meta(resp)))
+			continue
+		# 304 is only possible when conditional_headers found the blob or a legacy raw file
+		digest = read_meta(meta_path).get("sha256")
+		saved.append(blob_path(RAW_DIR, digest) if has_blob(RAW_DIR, digest) else raw_path)
+	return saved
@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+	"""
+	Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)].
+	"""
+	return random.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(resp: requests.Response) -> Optional[float]:
+	"""
+	Parse a Retry-After header (delta-seconds or HTTP date) into seconds to wait.
+	"""
+	value = resp.headers.get("Retry-After")
+	if not value:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	try:
+		return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+	except (TypeError, ValueError):
+		return None
+
+
+class FetchEngine:
+	"""
+	Thread-pooled HTTP fetcher sharing one keep-alive session.
+
+	Requests to the same host are capped at `per_host` in flight; transient failures
+	(connection errors, timeouts, 429 and 5xx) are retried with jittered exponential backoff.
+	"""
+
+	def __init__(
+		self,
+		max_workers: int = 16,
+		per_host: int = 4,
+		retry: int = 2,
+		backoff_base: float = 0.5,
+		backoff_cap: float = 30.0,
+		timeout: float = 60,
+		headers: Optional[Dict[str, str]] = None,
+	):
+		self.retry = retry
+		self.backoff_base = backoff_base
+		self.backoff_cap = backoff_cap
+		self.timeout = timeout
+		self.per_host = per_host
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		if headers:
+			self.session.headers.update(headers)
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+		self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+		self._lock = threading.Lock()
+
+	def _slot(self, url: str) -> threading.BoundedSemaphore:
+		host = urlsplit(url).netloc
+		with self._lock:
+			sem = self._host_slots.get(host)
+			if sem is None:
+				sem = threading.BoundedSemaphore(self.per_host)
+				self._host_slots[host] = sem
+			return sem
+
+	def fetch(
+		self,
+		url: str,
+		headers: Optional[Dict[str, str]] = None,
+		params: Optional[Dict[str, Any]] = None,
+		retry: Optional[int] = None,
+		backoff_base: Optional[float] = None,
+	) -> requests.Response:
+		"""
+		Fetch a URL in the calling thread, honouring the per-host limit and retry policy.
+		`retry` and `backoff_base` override the engine defaults for this call.
+		"""
+		retry = self.retry if retry is None else retry
+		base = self.backoff_base if backoff_base is None else backoff_base
+		slot = self._slot(url)
+		for attempt in range(retry + 1):
+			wait: Optional[float] = None
+			try:
+				with slot:
+					resp = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+				if resp.status_code in RETRY_STATUSES and attempt < retry:
+					wait = retry_after_seconds(resp)
+				else:
+					resp.raise_for_status()
+					return resp
+			except (requests.ConnectionError, requests.Timeout):
+				if attempt >= retry:
+					raise
+			if wait is None:
+				wait = backoff_delay(attempt, base, self.backoff_cap)
+			time.sleep(min(wait, self.backoff_cap))
+		raise RuntimeError("unreachable")  # pragma: no cover
+
+	def submit(self, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None) -> "Future[requests.Response]":
+		return self._executor.submit(self.fetch, url, headers, params)
+
+	def fetch_many(self, urls: Iterable[str], headers: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, requests.Response]]:
+		"""
+		Fetch URLs concurrently and yield (url, response) pairs in input order.
+		The first failure is re-raised once its turn comes.
+		"""
+		futures: List[Tuple[str, Future]] = [(url, self.submit(url, headers)) for url in urls]
+		for url, fut in futures:
+			yield url, fut.result()
+
+	def close(self) -> None:
+		self._executor.shutdown(wait=True)
+		self.session.close()
+
+
+_ENGINE: Optional[FetchEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine(**kwargs: Any) -> FetchEngine:
+	"""
+	Return the process-wide engine, creating it on first use (kwargs only apply then).
+	"""
+	global _ENGINE
+	with _ENGINE_LOCK:
+		if _ENGINE is None:
+			_ENGINE = FetchEngine(**kwargs)
+		return _ENGINE
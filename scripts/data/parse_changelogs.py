@@ -1,12 +1,44 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
 import re
 import json
 
 from bs4 import BeautifulSoup  # pip install beautifulsoup4
+from lxml import etree  # pip install lxml
+
+from .common import latest_source_digest, load_latest, open_latest
 
 RAW_BASE = Path("data") / "raw" / "changelogs"
-OUT_PATH = Path("data") / "processed" / "changelog_items.json"
+OUT_PATH = Path("data") / "processed" / "changelog_items.jsonl"
+# Per-section content hashes and extracted items from the previous run
+CACHE_PATH = Path("data") / "processed" / "changelog_sections.cache.json"
+
+SERIES_TO_URL = {
+	"3.12": "https://docs.python.org/3.12/whatsnew/changelog.html",
+	"3.13": "https://docs.python.org/3.13/whatsnew/changelog.html",
+}
+
+
+def _make_item(series: str, sec_id: str, title_text: str, bullets: List[str], base_url: str) -> Optional[Dict[str, Any]]:
+	# Derive version like 3.12.2 from id
+	m = re.search(r"python-(\d+)-(\d+)-(\d+)", sec_id)
+	if not m:
+		return None
+	version = f"{m.group(1)}.{m.group(2)}.{m.group(3)}"
+	# Title contains date like "Python 3.12.2 (March 19, 2024)"
+	date_match = re.search(r"\((.*?)\)", title_text)
+	date_text = date_match.group(1) if date_match else ""
+	return {
+		"series": series,
+		"version": version,
+		"title": title_text,
+		"date_text": date_text,
+		"bullets": bullets,
+		"source": f"{base_url}#{sec_id}",
+	}
 
 
 def parse_changelog_html(html_content: str, base_url: str, series: str) -> List[Dict[str, Any]]:
@@ -20,59 +52,185 @@ def parse_changelog_html(html_content: str, base_url: str, series: str) -> List[
 	items: List[Dict[str, Any]] = []
 	for sec in soup.select(sec_selector):
 		sec_id = sec.get("id", "")
-		# Derive version like 3.12.2 from id
-		m = re.search(r"python-(\d+)-(\d+)-(\d+)", sec_id)
-		if not m:
-			continue
-		version = f"{m.group(1)}.{m.group(2)}.{m.group(3)}"
-		# Title contains date like "Python 3.12.2 (March 19, 2024)"
 		title_el = sec.find(["h2", "h1"])
 		title_text = title_el.get_text(" ", strip=True) if title_el else ""
-		date_match = re.search(r"\((.*?)\)", title_text)
-		date_text = date_match.group(1) if date_match else ""
 		# Collect bullet points under the section
 		bullets: List[str] = []
 		for li in sec.select("li"):
 			text = li.get_text(" ", strip=True)
 			if text:
 				bullets.append(text)
-		items.append({
-			"series": series,
-			"version": version,
-			"title": title_text,
-			"date_text": date_text,
-			"bullets": bullets,
-			"source": f"{base_url}#{sec_id}",
-		})
+		item = _make_item(series, sec_id, title_text, bullets, base_url)
+		if item:
+			items.append(item)
 	return items
 
 
-def load_file(path: Path) -> str:
+def _element_text(el: Any) -> str:
+	"""
+	lxml equivalent of BeautifulSoup's get_text(" ", strip=True): comments are skipped,
+	their tails are kept.
+	"""
+	parts: List[str] = []
+
+	def walk(node: Any) -> None:
+		if node.text:
+			parts.append(node.text)
+		for child in node:
+			if isinstance(child.tag, str):
+				walk(child)
+			if child.tail:
+				parts.append(child.tail)
+
+	walk(el)
+	return " ".join(s for s in (p.strip() for p in parts) if s)
+
+
+def iter_changelog_sections(fp: BinaryIO, series: str) -> Iterator[Any]:
+	"""
+	Stream matching release <section> elements out of an HTML byte stream with lxml iterparse.
+	Each section is released once the caller resumes, so memory stays bounded by one release.
+	"""
+	prefix = f"python-{series.replace('.', '-')}-"
+	for _, sec in etree.iterparse(fp, events=("end",), tag="section", html=True, encoding="utf-8"):
+		if not sec.get("id", "").startswith(prefix):
+			continue
+		yield sec
+		sec.clear()
+		parent = sec.getparent()
+		if parent is not None:
+			# Drop already-processed siblings so the partial tree does not grow with the page
+			while sec.getprevious() is not None:
+				del parent[0]
+
+
+def _section_item(sec: Any, base_url: str, series: str) -> Optional[Dict[str, Any]]:
+	title_el = next(sec.iter("h1", "h2"), None)
+	title_text = _element_text(title_el) if title_el is not None else ""
+	bullets = [t for t in (_element_text(li) for li in sec.iter("li")) if t]
+	return _make_item(series, sec.get("id", ""), title_text, bullets, base_url)
+
+
+def parse_changelog_stream(fp: BinaryIO, base_url: str, series: str) -> Iterator[Dict[str, Any]]:
+	"""
+	Streaming counterpart of parse_changelog_html; yields identical items one release at a time.
+	"""
+	for sec in iter_changelog_sections(fp, series):
+		item = _section_item(sec, base_url, series)
+		if item:
+			yield item
+
+
+def parse_changelog_incremental(fp: BinaryIO, base_url: str, series: str, cached: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any], int]:
+	"""
+	Like parse_changelog_stream, but reuse the cached item of every section whose serialized
+	markup hashes the same as last run. Returns (items, new section cache, sections reused).
+	"""
+	items: List[Dict[str, Any]] = []
+	sections: Dict[str, Any] = {}
+	reused = 0
+	for sec in iter_changelog_sections(fp, series):
+		sec_id = sec.get("id", "")
+		digest = hashlib.sha256(etree.tostring(sec, with_tail=False)).hexdigest()
+		prev = cached.get(sec_id)
+		if prev and prev.get("sha256") == digest:
+			item = prev.get("item")
+			reused += 1
+		else:
+			item = _section_item(sec, base_url, series)
+		sections[sec_id] = {"sha256": digest, "item": item}
+		if item:
+			items.append(item)
+	return items, sections, reused
+
+
+def load_file(path: Path, source: Optional[str] = None) -> str:
+	"""
+	Read a raw changelog. With `source`, the latest blob recorded in the manifest wins;
+	`path` is the fallback for snapshots saved before the content-addressed store.
+	"""
+	if source:
+		blob = load_latest(source)
+		if blob is not None:
+			return blob.decode("utf-8")
 	with open(path, "r", encoding="utf-8") as f:
 		return f.read()
 
 
+def open_file(path: Path, source: Optional[str] = None) -> BinaryIO:
+	"""
+	Binary streaming counterpart of load_file, resolved the same way.
+	"""
+	if source:
+		fp = open_latest(source)
+		if fp is not None:
+			return fp
+	return open(path, "rb")
+
+
+def parse_series(series: str, url: str, backend: str = "lxml", cached: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any], int]:
+	"""
+	Parse one series' changelog; runs in a worker process. Returns (items, cache entry,
+	sections reused); items are [] if no snapshot exists.
+
+	With a cache entry from the previous run (lxml backend only), an unchanged source blob
+	is not opened at all and unchanged sections are not re-extracted.
+	"""
+	html_path = RAW_BASE / series / "changelog.html"
+	source_digest = latest_source_digest(url)
+	if cached and source_digest and cached.get("source_sha256") == source_digest:
+		sections = cached.get("sections", {})
+		items = [sec["item"] for sec in sections.values() if sec.get("item")]
+		return items, cached, len(sections)
+	try:
+		if backend == "bs4":
+			return parse_changelog_html(load_file(html_path, source=url), url, series), {}, 0
+		with open_file(html_path, source=url) as fp:
+			items, sections, reused = parse_changelog_incremental(fp, url, series, (cached or {}).get("sections", {}))
+	except FileNotFoundError:
+		return [], {}, 0
+	return items, {"source_sha256": source_digest, "sections": sections}, reused
+
+
+def load_cache(path: Path = CACHE_PATH) -> Dict[str, Any]:
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
 def main() -> None:
-	series_to_url = {
-		"3.12": "https://docs.python.org/3.12/whatsnew/changelog.html",
-		"3.13": "https://docs.python.org/3.13/whatsnew/changelog.html",
-	}
-	all_items: List[Dict[str, Any]] = []
-	for series, url in series_to_url.items():
-		html_path = RAW_BASE / series / "changelog.html"
-		if not html_path.exists():
-			continue
-		html = load_file(html_path)
-		items = parse_changelog_html(html, url, series)
-		all_items.extend(items)
-	# Save
+	parser = argparse.ArgumentParser(description="Extract per-release changelog items to JSONL")
+	parser.add_argument("--backend", choices=["lxml", "bs4"], default="lxml")
+	parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per series, capped by CPUs)")
+	parser.add_argument("--full", action="store_true", help="Ignore the section cache and re-extract everything")
+	args = parser.parse_args()
+	series_list = list(SERIES_TO_URL)
+	cache = {} if args.full else load_cache()
+	new_cache: Dict[str, Any] = {}
 	OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-	with open(OUT_PATH, "w", encoding="utf-8") as f:
-		json.dump({"count": len(all_items), "items": all_items}, f, ensure_ascii=False, indent=2)
-	print(str(OUT_PATH))
+	count = 0
+	reused_total = 0
+	with ProcessPoolExecutor(max_workers=args.workers or min(len(series_list), 8)) as pool, open(OUT_PATH, "w", encoding="utf-8") as f:
+		results = pool.map(
+			parse_series,
+			series_list,
+			[SERIES_TO_URL[s] for s in series_list],
+			[args.backend] * len(series_list),
+			[cache.get(s) for s in series_list],
+		)
+		for series, (items, entry, reused) in zip(series_list, results):
+			for item in items:
+				f.write(json.dumps(item, ensure_ascii=False) + "\n")
+				count += 1
+			if entry:
+				new_cache[series] = entry
+			reused_total += reused
+	with open(CACHE_PATH, "w", encoding="utf-8") as f:
+		json.dump(new_cache, f, ensure_ascii=False)
+	print(f"{OUT_PATH} ({count} releases, {reused_total} sections reused)")
 
 
 if __name__ == "__main__":
 	main()
-
-
@@ -0,0 +1,112 @@
+import argparse
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .index import VectorStore
+
+
+# Query-time settings swept per index kind
+NPROBE_SWEEP = (1, 4, 16, 64)
+EF_SEARCH_SWEEP = (16, 32, 64, 128)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+	"""
+	Mean fraction of the true top-k ids present in the approximate top-k, per query row.
+	"""
+	k = truth.shape[1]
+	hits = sum(len(set(f[f >= 0].tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+	return hits / (len(truth) * k)
+
+
+def _timed_search(store: VectorStore, queries: np.ndarray, k: int) -> Dict[str, Any]:
+	"""
+	One query per search call, as in serving; returns ids plus latency percentiles in ms.
+	"""
+	ids = np.full((len(queries), k), -1, dtype=np.int64)
+	latencies = []
+	for i, q in enumerate(queries):
+		start = time.perf_counter()
+		hits = store.search(q[None, :], k=k)
+		latencies.append((time.perf_counter() - start) * 1000)
+		ids[i, : len(hits)] = [idx for idx, _ in hits]
+	return {"ids": ids, "p50_ms": float(np.percentile(latencies, 50)), "p99_ms": float(np.percentile(latencies, 99))}
+
+
+def benchmark(
+	embeddings: np.ndarray,
+	queries: np.ndarray,
+	k: int = 10,
+	kinds: Iterable[str] = ("ivf", "hnsw", "ivfpq"),
+	**index_params: Any,
+) -> List[Dict[str, Any]]:
+	"""
+	Recall@k and latency of each approximate index kind against exact flat search.
+
+	Every kind is built once on `embeddings`, then searched with each nprobe (IVF kinds) or
+	efSearch (HNSW) value from the sweep. Rows: kind, setting, recall, p50_ms, p99_ms, build_s.
+	"""
+	dim = embeddings.shape[1]
+	docs = [{} for _ in range(len(embeddings))]
+
+	start = time.perf_counter()
+	flat = VectorStore(dim, kind="flat")
+	flat.add(embeddings, docs)
+	exact = _timed_search(flat, queries, k)
+	rows = [{"kind": "flat", "setting": "", "recall": 1.0, "p50_ms": exact["p50_ms"], "p99_ms": exact["p99_ms"], "build_s": time.perf_counter() - start}]
+
+	for kind in kinds:
+		start = time.perf_counter()
+		store = VectorStore(dim, kind=kind, **index_params)
+		store.add(embeddings, docs)
+		build_s = time.perf_counter() - start
+		sweep = [("ef_search", v) for v in EF_SEARCH_SWEEP] if kind == "hnsw" else [("nprobe", v) for v in NPROBE_SWEEP]
+		for name, value in sweep:
+			store.set_search_params(**{name: value})
+			result = _timed_search(store, queries, k)
+			rows.append({
+				"kind": kind,
+				"setting": f"{name}={value}",
+				"recall": recall_at_k(result["ids"], exact["ids"]),
+				"p50_ms": result["p50_ms"],
+				"p99_ms": result["p99_ms"],
+				"build_s": build_s,
+			})
+	return rows
+
+
+def format_report(rows: List[Dict[str, Any]], k: int) -> str:
+	lines = [f"{'kind':<7} {'setting':<14} {f'recall@{k}':>9} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8}"]
+	for r in rows:
+		lines.append(f"{r['kind']:<7} {r['setting']:<14} {r['recall']:>9.3f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['build_s']:>8.2f}")
+	return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description="Recall@k vs latency of ANN index kinds against flat search")
+	parser.add_argument("--vectors", type=str, default=None, help=".npy matrix of corpus embeddings (e.g. exported from the embedding cache)")
+	parser.add_argument("--synthetic", type=int, default=20_000, help="Random corpus size when --vectors is not given")
+	parser.add_argument("--dim", type=int, default=384)
+	parser.add_argument("--queries", type=int, default=200, help="Rows held out of the corpus and used as queries")
+	parser.add_argument("--k", type=int, default=10)
+	parser.add_argument("--kinds", nargs="+", default=["ivf", "hnsw", "ivfpq"])
+	parser.add_argument("--nlist", type=int, default=None)
+	args = parser.parse_args(argv)
+
+	rng = np.random.default_rng(0)
+	if args.vectors:
+		data = np.load(args.vectors).astype(np.float32)
+	else:
+		data = rng.standard_normal((args.synthetic + args.queries, args.dim), dtype=np.float32)
+	order = rng.permutation(len(data))
+	queries, corpus = data[order[: args.queries]], data[order[args.queries :]]
+
+	rows = benchmark(corpus, queries, k=args.k, kinds=args.kinds, nlist=args.nlist)
+	print(f"corpus={len(corpus)} queries={len(queries)} dim={corpus.shape[1]}")
+	print(format_report(rows, args.k))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,179 @@
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .kb import DocumentChunk
+
+
+# Fenced code blocks are kept whole; an unterminated fence runs to the end of the text
+_FENCE = re.compile(r"^[ \t]*(```|~~~).*?(?:^[ \t]*\1[^\n]*$|\Z)", re.M | re.S)
+# Paragraph breaks and sentence ends separate prose blocks
+_BREAK = re.compile(r"\n[ \t]*\n\s*|(?<=[.!?])\s+")
+TOKENIZE_BATCH = 1024
+
+Span = Tuple[int, int]
+
+
+def _trimmed(text: str, start: int, end: int) -> Span:
+	while start < end and text[start].isspace():
+		start += 1
+	while end > start and text[end - 1].isspace():
+		end -= 1
+	return start, end
+
+
+def _word_start(text: str, starts: np.ndarray, k: int) -> bool:
+	return starts[k] == 0 or text[starts[k] - 1].isspace()
+
+
+def _prose_spans(text: str, start: int, end: int) -> List[Span]:
+	spans = []
+	pos = start
+	for m in _BREAK.finditer(text, start, end):
+		spans.append(_trimmed(text, pos, m.start()))
+		pos = m.end()
+	spans.append(_trimmed(text, pos, end))
+	return [(s, e) for s, e in spans if e > s]
+
+
+def block_spans(text: str) -> List[Span]:
+	"""
+	Character spans of the text's blocks, in order: whole code fences, and sentences of the
+	prose between them. Whitespace between blocks belongs to no span.
+	"""
+	spans: List[Span] = []
+	pos = 0
+	for m in _FENCE.finditer(text):
+		spans += _prose_spans(text, pos, m.start())
+		spans.append(_trimmed(text, m.start(), m.end()))
+		pos = m.end()
+	spans += _prose_spans(text, pos, len(text))
+	return spans
+
+
+class TokenChunker:
+	"""
+	Packs sentence / code-fence blocks into chunks of at most `max_tokens` tokens of the
+	embedding model's own tokenizer.
+
+	Counts come from the fast tokenizer's offset mapping, one tokenizer call per batch of
+	documents, so a chunk never exceeds what the encoder keeps. Consecutive chunks share up to
+	`overlap` tokens of whole blocks. A single block longer than the budget (a long code fence)
+	is cut between tokens at the last word start that fits; pieces that must start mid-word
+	are re-tokenized and shrunk until they fit.
+	"""
+
+	def __init__(self, tokenizer: Any, max_tokens: int = 254, overlap: int = 30):
+		if overlap >= max_tokens:
+			raise ValueError("overlap must be smaller than max_tokens")
+		self.tokenizer = tokenizer
+		self.max_tokens = max_tokens
+		self.overlap = overlap
+
+	@classmethod
+	def for_encoder(cls, encoder: Any, overlap: int = 30) -> "TokenChunker":
+		"""
+		Chunker sized for a SentenceTransformer: its max_seq_length minus [CLS] and [SEP].
+		"""
+		return cls(encoder.tokenizer, max_tokens=encoder.max_seq_length - 2, overlap=overlap)
+
+	def offsets(self, texts: Sequence[str]) -> List[np.ndarray]:
+		"""
+		(n_tokens, 2) start/end character offsets per text, special tokens excluded.
+		"""
+		out = []
+		for i in range(0, len(texts), TOKENIZE_BATCH):
+			enc = self.tokenizer(list(texts[i : i + TOKENIZE_BATCH]), add_special_tokens=False, return_offsets_mapping=True)
+			for mapping in enc["offset_mapping"]:
+				arr = np.asarray(mapping, dtype=np.int64).reshape(-1, 2)
+				out.append(arr[arr[:, 1] > arr[:, 0]])
+		return out
+
+	def _split_long(self, text: str, starts: np.ndarray, ends: np.ndarray, first: int, last: int) -> List[Tuple[int, int, int]]:
+		pieces = []
+		i = first
+		while i < last:
+			j = min(i + self.max_tokens, last)
+			if j < last:
+				# Back off to the last word start in the window
+				for cut in range(j, i, -1):
+					if _word_start(text, starts, cut):
+						j = cut
+						break
+			n = j - i
+			if not _word_start(text, starts, i):
+				# The previous piece was cut inside a word (no whitespace in the window); a piece
+				# starting mid-word may tokenize to more tokens than it had in context, so re-count
+				n = len(self.offsets([text[starts[i] : ends[j - 1]]])[0])
+				while n > self.max_tokens and j - i > 1:
+					j = i + max(1, min(j - i - 1, (j - i) * self.max_tokens // n))
+					n = len(self.offsets([text[starts[i] : ends[j - 1]]])[0])
+			pieces.append((int(starts[i]), int(ends[j - 1]), n))
+			i = j
+		return pieces
+
+	def chunk_spans(self, text: str, offsets: np.ndarray) -> List[Tuple[int, int, int]]:
+		"""
+		(start, end, n_tokens) character spans of the chunks of one text.
+		"""
+		starts, ends = offsets[:, 0], offsets[:, 1]
+		chunks: List[Tuple[int, int, int]] = []
+		current: List[Tuple[int, int, int]] = []
+
+		def flush() -> None:
+			if current:
+				chunks.append((current[0][0], current[-1][1], sum(n for _, _, n in current)))
+
+		for s, e in block_spans(text):
+			first, last = int(np.searchsorted(starts, s)), int(np.searchsorted(starts, e))
+			n = last - first
+			if n == 0:
+				continue
+			if n > self.max_tokens:
+				flush()
+				current = []
+				chunks.extend(self._split_long(text, starts, ends, first, last))
+				continue
+			if current and sum(c[2] for c in current) + n > self.max_tokens:
+				flush()
+				# Carry whole trailing blocks into the next chunk, up to `overlap` tokens
+				tail: List[Tuple[int, int, int]] = []
+				for block in reversed(current):
+					if sum(c[2] for c in tail) + block[2] > self.overlap or sum(c[2] for c in tail) + block[2] + n > self.max_tokens:
+						break
+					tail.insert(0, block)
+				current = tail
+			current.append((s, e, n))
+		flush()
+		return chunks
+
+	def chunk_texts(self, texts: Sequence[str]) -> List[List[Tuple[str, int]]]:
+		"""
+		(chunk text, n_tokens) lists per text; the whole list is tokenized in batches.
+		"""
+		return [
+			[(text[s:e], n) for s, e, n in self.chunk_spans(text, offs)]
+			for text, offs in zip(texts, self.offsets(texts))
+		]
+
+
+def build_corpus_tokens(kb_records: List[Dict[str, Any]], chunker: TokenChunker) -> List[DocumentChunk]:
+	"""
+	build_corpus with token-budgeted, block-aligned chunks; meta also records n_tokens.
+	"""
+	texts = [(rec.get("title", "") + "\n" + rec.get("content", "")).strip() for rec in kb_records]
+	corpus: List[DocumentChunk] = []
+	for rec, chunks in zip(kb_records, chunker.chunk_texts(texts)):
+		for idx, (ch, n_tokens) in enumerate(chunks):
+			meta = {
+				"title": rec.get("title", ""),
+				"id": rec.get("id", ""),
+				"version": rec.get("version", ""),
+				"kind": rec.get("kind", ""),
+				"released": rec.get("released") or "",
+				"urls": [s.get("url") for s in rec.get("answer_card", {}).get("sources", [])],
+				"n_tokens": n_tokens,
+			}
+			corpus.append(DocumentChunk(str(rec.get("id", "")), idx, ch, meta))
+	return corpus
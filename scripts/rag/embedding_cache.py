@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# Layout under the cache root, one directory per model:
+#   <model slug>/meta.json     {"model_id", "dim"}
+#   <model slug>/vectors.f32   float32 rows, appended, read through np.memmap
+#   <model slug>/keys.txt      one content key per line, line i describes row i
+DEFAULT_CACHE_DIR = Path("data") / "cache" / "embeddings"
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+	"""
+	Canonical form used for cache keys: NFC, whitespace runs collapsed, stripped.
+	"""
+	return _WS.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_key(model_id: str, text: str) -> str:
+	return hashlib.sha256(f"{model_id}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def _slug(model_id: str) -> str:
+	return re.sub(r"[^A-Za-z0-9_.-]+", "__", model_id)
+
+
+class EmbeddingCache:
+	"""
+	On-disk embedding cache keyed by model id + hash of the normalized text.
+
+	Vectors live in a flat float32 file that is memory-mapped, so opening the cache costs one
+	read of the key list, and only rows that are actually requested are paged in. New vectors
+	are appended; rows are never rewritten. Single writer per directory.
+	"""
+
+	def __init__(self, model_id: str, dim: int, root: Path = DEFAULT_CACHE_DIR):
+		self.model_id = model_id
+		self.dim = dim
+		self.dir = Path(root) / _slug(model_id)
+		self.dir.mkdir(parents=True, exist_ok=True)
+		self._vectors_path = self.dir / "vectors.f32"
+		self._keys_path = self.dir / "keys.txt"
+		self._check_meta()
+		self._rows: Dict[str, int] = {}
+		self._mmap: Optional[np.memmap] = None
+		self._load()
+
+	def _check_meta(self) -> None:
+		meta_path = self.dir / "meta.json"
+		meta = {"model_id": self.model_id, "dim": self.dim}
+		if meta_path.exists():
+			with open(meta_path, "r", encoding="utf-8") as f:
+				found = json.load(f)
+			if found != meta:
+				raise ValueError(f"embedding cache at {self.dir} holds {found}, expected {meta}")
+		else:
+			with open(meta_path, "w", encoding="utf-8") as f:
+				json.dump(meta, f)
+
+	def _load(self) -> None:
+		lines: List[str] = []
+		if self._keys_path.exists():
+			with open(self._keys_path, "r", encoding="utf-8") as f:
+				lines = f.read().split("\n")
+		# Anything after the last newline is a partially written key
+		keys = [line for line in lines[:-1] if line]
+		row_bytes = 4 * self.dim
+		size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+		# Vectors are written before keys, so a torn append leaves rows (or part of one) that no
+		# key refers to. Cut both files back to the rows that have a key; otherwise the next
+		# append lands after the stray rows while its keys point at them.
+		keys = keys[: size // row_bytes]
+		if keys != lines[:-1] or lines[-1:] not in ([], [""]):
+			with open(self._keys_path, "w", encoding="utf-8") as f:
+				f.writelines(k + "\n" for k in keys)
+		if size != len(keys) * row_bytes:
+			with open(self._vectors_path, "r+b") as f:
+				f.truncate(len(keys) * row_bytes)
+		self._rows = {k: i for i, k in enumerate(keys)}
+		self._remap(len(keys))
+
+	def _remap(self, n_rows: int) -> None:
+		self._n = n_rows
+		self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(n_rows, self.dim)) if n_rows else None
+
+	def __len__(self) -> int:
+		return len(self._rows)
+
+	def __contains__(self, text: str) -> bool:
+		return text_key(self.model_id, text) in self._rows
+
+	def get(self, keys: Sequence[str]) -> np.ndarray:
+		"""
+		Vectors for cached keys, as a new (len(keys), dim) float32 array.
+		"""
+		if not keys:
+			return np.empty((0, self.dim), dtype=np.float32)
+		return np.asarray(self._mmap[[self._rows[k] for k in keys]], dtype=np.float32)
+
+	def put(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+		vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+		new = [i for i, k in enumerate(keys) if k not in self._rows]
+		new = list({keys[i]: i for i in new}.values())
+		if not new:
+			return
+		with open(self._vectors_path, "ab") as f:
+			f.write(vectors[new].tobytes())
+			f.flush()
+			os.fsync(f.fileno())
+		with open(self._keys_path, "a", encoding="utf-8") as f:
+			f.writelines(keys[i] + "\n" for i in new)
+		for i in new:
+			self._rows[keys[i]] = len(self._rows)
+		self._remap(len(self._rows))
+
+	def encode(self, texts: Sequence[str], encoder: Any, batch_size: int = 64) -> np.ndarray:
+		"""
+		Embeddings for texts, in order. Only texts whose normalized form is not cached yet are
+		passed to `encoder.encode` (a SentenceTransformer or anything with the same signature).
+		"""
+		keys = [text_key(self.model_id, t) for t in texts]
+		missing: Dict[str, str] = {}
+		for k, t in zip(keys, texts):
+			if k not in self._rows and k not in missing:
+				missing[k] = t
+		if missing:
+			miss_keys = list(missing)
+			miss_texts = [missing[k] for k in miss_keys]
+			for i in range(0, len(miss_texts), batch_size):
+				vecs = encoder.encode(miss_texts[i : i + batch_size], convert_to_numpy=True, show_progress_bar=False)
+				self.put(miss_keys[i : i + batch_size], vecs)
+		return self.get(keys)
@@ -0,0 +1,168 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from .index import embed
+from .kb import DocumentChunk
+
+
+# "3.12.3", "3.12.x", "3.14", "v3.13" -- a major.minor prefix is required
+_VERSION = re.compile(r"(?<![\w.])v?(\d+\.\d+(?:\.(?:\d+|x))?)(?![\w.]*\d)", re.I)
+
+
+@dataclass
+class QueryFilter:
+	"""
+	Restriction on chunk metadata; an empty list means "any".
+	"""
+	versions: List[str] = field(default_factory=list)
+	kinds: List[str] = field(default_factory=list)
+
+	def __bool__(self) -> bool:
+		return bool(self.versions or self.kinds)
+
+	def key(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+		return tuple(sorted(self.versions)), tuple(sorted(self.kinds))
+
+
+def parse_versions(query: str) -> List[str]:
+	"""
+	Python version numbers mentioned in a question, e.g. "What changed in 3.12.3?" -> ["3.12.3"].
+	"""
+	return list(dict.fromkeys(m.group(1).lower() for m in _VERSION.finditer(query)))
+
+
+def parse_query(query: str, kinds: Optional[Sequence[str]] = None) -> QueryFilter:
+	return QueryFilter(versions=parse_versions(query), kinds=list(kinds or []))
+
+
+def _version_parts(version: str) -> Tuple[str, ...]:
+	return tuple(p for p in str(version).lower().lstrip("v").split(".") if p)
+
+
+def version_matches(record_version: str, query_version: str) -> bool:
+	"""
+	True if the versions agree on every component both spell out; "x" matches anything.
+	So "3.12.3" matches records for "3.12.3", "3.12.x" and "3.12", but not "3.12.2".
+	"""
+	rec, query = _version_parts(record_version), _version_parts(query_version)
+	if not rec or not query:
+		return False
+	return all(a == b or "x" in (a, b) for a, b in zip(rec, query))
+
+
+def kind_values(kind: str) -> List[str]:
+	"""
+	Combined kinds such as "release+security" count as each of their parts.
+	"""
+	return [k for k in str(kind).lower().split("+") if k]
+
+
+class MetadataIndex:
+	"""
+	Per-field inverted index (value -> sorted row ids) over row-aligned chunk metadata.
+
+	Version lookups walk the distinct version values, not the rows, so resolving a filter
+	costs O(#distinct values + #matching rows).
+	"""
+
+	def __init__(self, metas: Sequence[Dict[str, Any]]):
+		self.n_rows = len(metas)
+		by_version: Dict[str, List[int]] = defaultdict(list)
+		by_kind: Dict[str, List[int]] = defaultdict(list)
+		for row, meta in enumerate(metas):
+			if meta.get("version"):
+				by_version[str(meta["version"]).lower()].append(row)
+			for kind in kind_values(meta.get("kind", "")):
+				by_kind[kind].append(row)
+		self.versions = {v: np.asarray(rows, dtype=np.int64) for v, rows in by_version.items()}
+		self.kinds = {k: np.asarray(rows, dtype=np.int64) for k, rows in by_kind.items()}
+
+	def rows(self, flt: QueryFilter) -> Optional[np.ndarray]:
+		"""
+		Sorted rows satisfying the filter, or None if the filter does not restrict anything.
+		"""
+		selected: Optional[np.ndarray] = None
+		if flt.versions:
+			parts = [rows for v, rows in self.versions.items() if any(version_matches(v, q) for q in flt.versions)]
+			selected = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+		if flt.kinds:
+			parts = [self.kinds[k] for k in {k.lower() for k in flt.kinds} if k in self.kinds]
+			kind_rows = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+			selected = kind_rows if selected is None else np.intersect1d(selected, kind_rows, assume_unique=True)
+		return selected
+
+
+def search_parameters(index: Any, rows: np.ndarray) -> Any:
+	"""
+	FAISS search parameters that only consider `rows`, keeping the index's nprobe / efSearch.
+	"""
+	selector = faiss.IDSelectorBatch(rows.astype(np.int64))
+	if isinstance(index, faiss.IndexHNSW):
+		return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+	try:
+		ivf = faiss.extract_index_ivf(index)
+	except RuntimeError:
+		return faiss.SearchParameters(sel=selector)
+	return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+
+
+def filtered_search(index: Any, query_embs: np.ndarray, k: int, rows: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	index.search restricted to `rows` (None = unrestricted); query_embs must be normalized.
+	"""
+	if rows is None:
+		return index.search(query_embs, k)
+	return index.search(query_embs, k, params=search_parameters(index, rows))
+
+
+class FilteredRetriever:
+	"""
+	Dense chunk retrieval (index from build_faiss_index or a VectorStore's index) restricted
+	by metadata. Versions are parsed from each question unless given; if a filter matches no
+	chunk at all, that query falls back to the whole corpus rather than returning nothing.
+	"""
+
+	def __init__(self, chunks: List[DocumentChunk], index: Any, encoder: Any):
+		self.chunks = chunks
+		self.index = index
+		self.encoder = encoder
+		self.meta_index = MetadataIndex([c.meta for c in chunks])
+
+	def search_many(
+		self,
+		queries: List[str],
+		top_k: int = 3,
+		kinds: Optional[Sequence[str]] = None,
+		versions: Optional[Sequence[str]] = None,
+	) -> List[List[Tuple[float, DocumentChunk]]]:
+		if not queries:
+			return []
+		q_emb = embed(queries, self.encoder)
+		faiss.normalize_L2(q_emb)
+
+		# Queries with the same filter share one search call
+		groups: Dict[Any, List[int]] = defaultdict(list)
+		filters = []
+		for i, query in enumerate(queries):
+			flt = QueryFilter(list(versions), list(kinds or [])) if versions is not None else parse_query(query, kinds)
+			filters.append(flt)
+			groups[flt.key()].append(i)
+
+		results: List[List[Tuple[float, DocumentChunk]]] = [[] for _ in queries]
+		for members in groups.values():
+			rows = self.meta_index.rows(filters[members[0]])
+			if rows is not None and len(rows) == 0:
+				rows = None
+			k = top_k if rows is None else min(top_k, len(rows))
+			scores, idxs = filtered_search(self.index, q_emb[members], k, rows)
+			for i, row_scores, row_idxs in zip(members, scores, idxs):
+				results[i] = [(float(s), self.chunks[int(j)]) for s, j in zip(row_scores, row_idxs) if j != -1]
+		return results
+
+	def search(self, query: str, top_k: int = 3, kinds: Optional[Sequence[str]] = None) -> List[Tuple[float, DocumentChunk]]:
+		return self.search_many([query], top_k, kinds=kinds)[0]
@@ -0,0 +1,136 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from .index import embed
+from .kb import DocumentChunk
+
+
+# Identifiers like "cve-2024-6232", "3.12.3" or "f-string" stay whole; their parts are indexed too
+_TOKEN = re.compile(r"[a-z0-9_]+(?:[-.][a-z0-9_]+)*")
+_PART = re.compile(r"[a-z0-9_]+")
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+	tokens = []
+	for m in _TOKEN.finditer(text.lower()):
+		tok = m.group(0)
+		tokens.append(tok)
+		if "-" in tok or "." in tok:
+			tokens.extend(_PART.findall(tok))
+	return tokens
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+	"""
+	Indices of the k largest scores, best first, via partial selection (no full sort).
+	"""
+	if k >= len(scores):
+		return np.argsort(-scores, kind="stable")
+	part = np.argpartition(-scores, k - 1)[:k]
+	return part[np.argsort(-scores[part], kind="stable")]
+
+
+class BM25Index:
+	"""
+	Okapi BM25 over an inverted index: term -> (doc ids, term frequencies).
+
+	A query only touches the postings of its own terms, and the top-k of the matched docs is
+	picked with argpartition, so cost follows the postings read rather than corpus size.
+	"""
+
+	def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+		self.k1 = k1
+		self.b = b
+		postings: Dict[str, Tuple[List[int], List[int]]] = {}
+		lengths = []
+		for doc_id, text in enumerate(texts):
+			counts = Counter(tokenize(text))
+			lengths.append(sum(counts.values()))
+			for term, tf in counts.items():
+				ids, tfs = postings.setdefault(term, ([], []))
+				ids.append(doc_id)
+				tfs.append(tf)
+		self.n_docs = len(lengths)
+		self.doc_len = np.asarray(lengths, dtype=np.float32)
+		avg_len = float(self.doc_len.mean()) if self.n_docs else 0.0
+		# Length normalization k1 * (1 - b + b * len / avg) is fixed per doc, so precompute it
+		self._norm = self.k1 * (1 - self.b + self.b * self.doc_len / (avg_len or 1.0))
+		self._postings = {t: (np.asarray(ids, dtype=np.int64), np.asarray(tfs, dtype=np.float32)) for t, (ids, tfs) in postings.items()}
+
+	def idf(self, term: str) -> float:
+		ids = self._postings.get(term)
+		df = 0 if ids is None else len(ids[0])
+		return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+	def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+		"""
+		(doc id, BM25 score) for the k best docs sharing at least one term with the query.
+		"""
+		ids, contribs = [], []
+		for term in set(tokenize(query)):
+			posting = self._postings.get(term)
+			if posting is None:
+				continue
+			doc_ids, tf = posting
+			ids.append(doc_ids)
+			contribs.append(self.idf(term) * tf * (self.k1 + 1) / (tf + self._norm[doc_ids]))
+		if not ids:
+			return []
+		docs, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+		scores = np.bincount(inverse, weights=np.concatenate(contribs))
+		best = top_k_indices(scores, k)
+		return [(int(docs[i]), float(scores[i])) for i in best]
+
+
+def rrf_fuse(rankings: Sequence[Sequence[int]], k: int, rrf_k: int = RRF_K) -> List[Tuple[int, float]]:
+	"""
+	Reciprocal-rank fusion: score(d) = sum over rankings of 1 / (rrf_k + rank of d), rank from 1.
+	"""
+	fused: Dict[int, float] = {}
+	for ranking in rankings:
+		for rank, doc_id in enumerate(ranking, start=1):
+			fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+	return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+class HybridRetriever:
+	"""
+	BM25 + dense retrieval over one DocumentChunk corpus, fused with RRF.
+
+	`index` is the chunk index from build_faiss_index (row i is chunks[i]). Each side
+	contributes its top `candidates` chunks; exact identifiers such as "PEP 722" get lexical
+	recall even when the dense side ranks them low.
+	"""
+
+	def __init__(self, chunks: List[DocumentChunk], index: Any, encoder: Any, candidates: int = 50, rrf_k: int = RRF_K):
+		self.chunks = chunks
+		self.index = index
+		self.encoder = encoder
+		self.candidates = candidates
+		self.rrf_k = rrf_k
+		self.bm25 = BM25Index([c.text for c in chunks])
+
+	def search_many(self, queries: List[str], top_k: int = 3) -> List[List[Tuple[float, DocumentChunk]]]:
+		"""
+		(RRF score, chunk) lists per query; dense queries are encoded and searched as one batch.
+		"""
+		if not queries:
+			return []
+		q_emb = embed(queries, self.encoder)
+		faiss.normalize_L2(q_emb)
+		_, dense_ids = self.index.search(q_emb, min(self.candidates, len(self.chunks)))
+		results = []
+		for query, dense in zip(queries, dense_ids.tolist()):
+			sparse = [doc_id for doc_id, _ in self.bm25.search(query, self.candidates)]
+			fused = rrf_fuse([[i for i in dense if i != -1], sparse], top_k, self.rrf_k)
+			results.append([(score, self.chunks[i]) for i, score in fused])
+		return results
+
+	def search(self, query: str, top_k: int = 3) -> List[Tuple[float, DocumentChunk]]:
+		return self.search_many([query], top_k)[0]
@@ -0,0 +1,198 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+from .index import STORE_CONFIG, STORE_INDEX, embed, make_index
+from .kb import DocumentChunk, KBDiff, build_corpus, diff_kb, record_hash, record_id
+
+
+STORE_STATE = "state.json"
+
+
+def _text_hash(text: str) -> str:
+	return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IncrementalStore:
+	"""
+	Chunk index keyed by stable int64 ids, so KB records can be upserted and deleted in place.
+
+	kind="flat" wraps IndexFlatIP in IndexIDMap2; "ivf" / "ivfpq" use the IVF index's own ids
+	and are trained on the first batch of vectors (HNSW cannot remove vectors). Upserting a
+	record keeps the vectors of chunks whose text is unchanged and embeds only new chunk texts.
+	"""
+
+	def __init__(self, dim: int, kind: str = "flat", nprobe: int = 8, **index_params: Any):
+		if kind not in ("flat", "ivf", "ivfpq"):
+			raise ValueError(f"index kind {kind!r} does not support deletes; use flat, ivf or ivfpq")
+		self.dim = dim
+		self.kind = kind
+		self.nprobe = nprobe
+		self.index_params = index_params
+		self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim)) if kind == "flat" else None
+		self.chunks: Dict[int, DocumentChunk] = {}
+		self.record_chunks: Dict[str, List[int]] = {}
+		self.record_hashes: Dict[str, str] = {}
+		self._text_hashes: Dict[int, str] = {}
+		self._next_id = 0
+
+	def __len__(self) -> int:
+		return len(self.chunks)
+
+	def _add(self, ids: List[int], vectors: np.ndarray) -> None:
+		vectors = np.array(vectors, dtype=np.float32).reshape(-1, self.dim)
+		faiss.normalize_L2(vectors)
+		if self.index is None:
+			self.index = make_index(self.kind, self.dim, len(vectors), **self.index_params)
+			self.index.train(vectors)
+			faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+		self.index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+
+	def _remove(self, ids: List[int]) -> None:
+		if ids and self.index is not None:
+			self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+		for cid in ids:
+			del self.chunks[cid]
+			del self._text_hashes[cid]
+
+	def upsert(self, rid: str, chunks: List[DocumentChunk], encoder: Any, cache: Optional[EmbeddingCache] = None) -> Tuple[int, int, int]:
+		"""
+		Replace the chunks of record `rid`. Returns (kept, added, removed) chunk counts.
+		"""
+		return self.upsert_many({rid: chunks}, encoder, cache)
+
+	def upsert_many(self, records: Dict[str, List[DocumentChunk]], encoder: Any, cache: Optional[EmbeddingCache] = None) -> Tuple[int, int, int]:
+		"""
+		Replace the chunks of several records; new chunk texts are embedded and added as one
+		batch (which is also what an untrained IVF index is trained on).
+		Returns (kept, added, removed) chunk counts.
+		"""
+		kept: List[Tuple[int, DocumentChunk]] = []
+		stale: List[int] = []
+		fresh: List[DocumentChunk] = []
+		slots: Dict[str, List[Optional[int]]] = {}
+		for rid, chunks in records.items():
+			reusable: Dict[str, List[int]] = {}
+			for cid in self.record_chunks.get(rid, []):
+				reusable.setdefault(self._text_hashes[cid], []).append(cid)
+			ids: List[Optional[int]] = []
+			for ch in chunks:
+				same = reusable.get(_text_hash(ch.text))
+				if same:
+					cid = same.pop(0)
+					kept.append((cid, ch))
+					ids.append(cid)
+				else:
+					ids.append(None)
+					fresh.append(ch)
+			stale += [cid for cids in reusable.values() for cid in cids]
+			slots[rid] = ids
+
+		# Embed (and add) before touching any state, so a failing encoder leaves the store as it was
+		new_ids = list(range(self._next_id, self._next_id + len(fresh)))
+		if fresh:
+			self._add(new_ids, embed([c.text for c in fresh], encoder, cache))
+		self._next_id += len(fresh)
+		self._remove(stale)
+		for cid, ch in kept:
+			self.chunks[cid] = ch  # metadata may still have changed
+		for cid, ch in zip(new_ids, fresh):
+			self.chunks[cid] = ch
+			self._text_hashes[cid] = _text_hash(ch.text)
+		it = iter(new_ids)
+		for rid, ids in slots.items():
+			self.record_chunks[rid] = [cid if cid is not None else next(it) for cid in ids]
+		return len(kept), len(fresh), len(stale)
+
+	def delete(self, rid: str) -> int:
+		"""
+		Drop every chunk of record `rid`; returns how many were removed.
+		"""
+		ids = self.record_chunks.pop(rid, [])
+		self.record_hashes.pop(rid, None)
+		self._remove(ids)
+		return len(ids)
+
+	def sync(
+		self,
+		records: List[Dict[str, Any]],
+		encoder: Any,
+		cache: Optional[EmbeddingCache] = None,
+		chunker: Callable[[List[Dict[str, Any]]], List[DocumentChunk]] = build_corpus,
+	) -> KBDiff:
+		"""
+		Bring the index in line with raw KB records: unchanged records are skipped, removed
+		ones deleted, and added or changed ones re-chunked with `chunker` and upserted.
+		"""
+		diff = diff_kb(self.record_hashes, records)
+		for rid in diff.removed:
+			self.delete(rid)
+		touched = set(diff.added) | set(diff.changed)
+		updates = {}
+		hashes = {}
+		for rec in records:
+			rid = record_id(rec)
+			if rid in touched:
+				updates[rid] = chunker([rec])
+				hashes[rid] = record_hash(rec)
+		self.upsert_many(updates, encoder, cache)
+		# Only mark records synced once their chunks are in the index
+		self.record_hashes.update(hashes)
+		return diff
+
+	def search_many(self, query_embs: np.ndarray, k: int = 5) -> List[List[Tuple[float, DocumentChunk]]]:
+		"""
+		(score, chunk) lists per query row from one index.search.
+		"""
+		query_embs = np.array(query_embs, dtype=np.float32).reshape(-1, self.dim)
+		if self.index is None or not self.chunks:
+			return [[] for _ in range(len(query_embs))]
+		faiss.normalize_L2(query_embs)
+		D, I = self.index.search(query_embs, k)
+		return [
+			[(float(score), self.chunks[cid]) for cid, score in zip(ids, scores) if cid != -1]
+			for ids, scores in zip(I.tolist(), D.tolist())
+		]
+
+	def save(self, path: Path) -> None:
+		path = Path(path)
+		path.mkdir(parents=True, exist_ok=True)
+		if self.index is not None:
+			faiss.write_index(self.index, str(path / STORE_INDEX))
+		state = {
+			"next_id": self._next_id,
+			"record_chunks": self.record_chunks,
+			"record_hashes": self.record_hashes,
+			"chunks": {
+				str(cid): {"doc_id": ch.doc_id, "chunk_id": ch.chunk_id, "text": ch.text, "meta": ch.meta}
+				for cid, ch in self.chunks.items()
+			},
+		}
+		with open(path / STORE_STATE, "w", encoding="utf-8") as f:
+			json.dump(state, f, ensure_ascii=False)
+		with open(path / STORE_CONFIG, "w", encoding="utf-8") as f:
+			json.dump({"dim": self.dim, "kind": self.kind, "nprobe": self.nprobe, **self.index_params}, f, indent=2)
+
+	@classmethod
+	def load(cls, path: Path) -> "IncrementalStore":
+		path = Path(path)
+		with open(path / STORE_CONFIG, "r", encoding="utf-8") as f:
+			store = cls(**json.load(f))
+		if (path / STORE_INDEX).exists():
+			store.index = faiss.read_index(str(path / STORE_INDEX))
+			if store.kind != "flat":
+				faiss.extract_index_ivf(store.index).nprobe = store.nprobe
+		with open(path / STORE_STATE, "r", encoding="utf-8") as f:
+			state = json.load(f)
+		store._next_id = state["next_id"]
+		store.record_chunks = state["record_chunks"]
+		store.record_hashes = state["record_hashes"]
+		for cid, ch in state["chunks"].items():
+			store.chunks[int(cid)] = DocumentChunk(ch["doc_id"], ch["chunk_id"], ch["text"], ch["meta"])
+			store._text_hashes[int(cid)] = _text_hash(ch["text"])
+		return store
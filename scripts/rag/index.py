@@ -0,0 +1,244 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import json
+import math
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+from .kb import DocumentChunk, sanitize_meta
+
+
+EMBED_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"  # small, fast
+
+
+INDEX_KINDS = ("flat", "ivf", "hnsw", "ivfpq")
+STORE_INDEX = "index.faiss"
+STORE_DOCS = "docs.jsonl"
+STORE_CONFIG = "store.json"
+
+
+def default_nlist(n: int) -> int:
+	"""
+	IVF list count: ~4*sqrt(n), capped so k-means sees the ~39 points per centroid FAISS asks for.
+	"""
+	return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def make_index(kind: str, dim: int, n_train: int, nlist: Optional[int] = None, hnsw_m: int = 32, pq_m: Optional[int] = None) -> Any:
+	"""
+	Inner-product FAISS index of the given kind (vectors are L2-normalized, so IP is cosine).
+	n_train is the number of vectors the index will be trained on and sizes IVF/PQ defaults.
+	"""
+	if kind == "flat":
+		return faiss.IndexFlatIP(dim)
+	if kind == "hnsw":
+		return faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+	if kind not in INDEX_KINDS:
+		raise ValueError(f"unknown index kind {kind!r}; expected one of {INDEX_KINDS}")
+	nlist = nlist or default_nlist(n_train)
+	quantizer = faiss.IndexFlatIP(dim)
+	if kind == "ivf":
+		return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+	pq_m = pq_m or next(m for m in (48, 32, 24, 16, 12, 8, 4, 2, 1) if dim % m == 0)
+	# Each sub-quantizer runs k-means with 2**nbits centroids; same ~39 points per centroid
+	nbits = max(1, min(8, int(math.log2(max(n_train // 39, 2)))))
+	return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, nbits, faiss.METRIC_INNER_PRODUCT)
+
+
+class VectorStore:
+	"""
+	FAISS index plus the docs its rows point to.
+
+	kind="flat" is exact brute force. "ivf", "hnsw" and "ivfpq" are approximate; IVF kinds are
+	trained on a random sample (at most `train_size` vectors) of the first batch added, and
+	`nprobe` / `ef_search` trade recall for latency at query time.
+	"""
+
+	def __init__(
+		self,
+		dim: int,
+		kind: str = "flat",
+		nlist: Optional[int] = None,
+		hnsw_m: int = 32,
+		pq_m: Optional[int] = None,
+		nprobe: int = 8,
+		ef_search: int = 64,
+		train_size: int = 100_000,
+		seed: int = 0,
+	):
+		if kind not in INDEX_KINDS:
+			raise ValueError(f"unknown index kind {kind!r}; expected one of {INDEX_KINDS}")
+		self.dim = dim
+		self.kind = kind
+		self.params = {"nlist": nlist, "hnsw_m": hnsw_m, "pq_m": pq_m, "train_size": train_size, "seed": seed}
+		self.nprobe = nprobe
+		self.ef_search = ef_search
+		# IVF kinds are created on the first add(), once the training set size is known
+		self.index = None if kind in ("ivf", "ivfpq") else make_index(kind, dim, 0, hnsw_m=hnsw_m)
+		self.docs: List[Dict[str, Any]] = []
+		self._apply_search_params()
+
+	def _apply_search_params(self) -> None:
+		if self.index is None:
+			return
+		if self.kind == "hnsw":
+			self.index.hnsw.efSearch = self.ef_search
+		elif self.kind in ("ivf", "ivfpq"):
+			faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+
+	def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+		if nprobe is not None:
+			self.nprobe = nprobe
+		if ef_search is not None:
+			self.ef_search = ef_search
+		self._apply_search_params()
+
+	def _train(self, embeddings: np.ndarray) -> None:
+		rng = np.random.default_rng(self.params["seed"])
+		n = min(len(embeddings), self.params["train_size"])
+		sample = embeddings[rng.choice(len(embeddings), size=n, replace=False)] if n < len(embeddings) else embeddings
+		self.index = make_index(self.kind, self.dim, n, self.params["nlist"], self.params["hnsw_m"], self.params["pq_m"])
+		self.index.train(sample)
+		self._apply_search_params()
+
+	def add(self, embeddings: np.ndarray, docs: List[Dict[str, Any]]) -> None:
+		embeddings = np.array(embeddings, dtype=np.float32)  # normalized in place below
+		faiss.normalize_L2(embeddings)
+		if self.index is None:
+			self._train(embeddings)
+		self.index.add(embeddings)
+		self.docs.extend(docs)
+
+	def search(self, query_emb: np.ndarray, k: int = 5) -> List[Tuple[int, float]]:
+		return self.search_many(query_emb, k)[0]
+
+	def search_many(self, query_embs: np.ndarray, k: int = 5) -> List[List[Tuple[int, float]]]:
+		"""
+		(row, score) pairs per query row, from a single index.search over the whole matrix.
+		Rows may be -1 when the index holds fewer than k vectors.
+		"""
+		query_embs = np.array(query_embs, dtype=np.float32).reshape(-1, self.dim)
+		if self.index is None:
+			return [[] for _ in range(len(query_embs))]
+		faiss.normalize_L2(query_embs)
+		D, I = self.index.search(query_embs, k)
+		return [list(zip(ids, scores)) for ids, scores in zip(I.tolist(), D.tolist())]
+
+	def save(self, path: Path) -> None:
+		"""
+		Persist index, docs and configuration to a directory.
+		"""
+		path = Path(path)
+		path.mkdir(parents=True, exist_ok=True)
+		if self.index is not None:
+			faiss.write_index(self.index, str(path / STORE_INDEX))
+		with open(path / STORE_DOCS, "w", encoding="utf-8") as f:
+			for doc in self.docs:
+				f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+		config = {"dim": self.dim, "kind": self.kind, "nprobe": self.nprobe, "ef_search": self.ef_search, **self.params}
+		with open(path / STORE_CONFIG, "w", encoding="utf-8") as f:
+			json.dump(config, f, indent=2)
+
+	@classmethod
+	def load(cls, path: Path) -> "VectorStore":
+		path = Path(path)
+		with open(path / STORE_CONFIG, "r", encoding="utf-8") as f:
+			config = json.load(f)
+		store = cls(**config)
+		if (path / STORE_INDEX).exists():
+			store.index = faiss.read_index(str(path / STORE_INDEX))
+			store._apply_search_params()
+		with open(path / STORE_DOCS, "r", encoding="utf-8") as f:
+			store.docs = [json.loads(line) for line in f if line.strip()]
+		return store
+
+
+def embed(texts: List[str], encoder: Any, cache: Optional[EmbeddingCache] = None, batch_size: int = 64) -> np.ndarray:
+	"""
+	Encode texts, through the cache when one is given.
+	"""
+	if cache is not None:
+		return cache.encode(texts, encoder, batch_size=batch_size)
+	return encoder.encode(texts, convert_to_numpy=True, show_progress_bar=False, batch_size=batch_size)
+
+
+def build_index(
+	records: List[Dict[str, Any]],
+	encoder: Any,
+	cache: Optional[EmbeddingCache] = None,
+	batch_size: int = 64,
+	kind: str = "flat",
+	**index_params: Any,
+) -> VectorStore:
+	"""
+	VectorStore over KB records (see kb.read_jsonl); unchanged records come from the cache.
+	index_params are passed to VectorStore (nlist, hnsw_m, pq_m, nprobe, ef_search, ...).
+	"""
+	store = VectorStore(dim=encoder.get_sentence_embedding_dimension(), kind=kind, **index_params)
+	if records:
+		store.add(embed([r["content"] for r in records], encoder, cache, batch_size), records)
+	return store
+
+
+def build_faiss_index(chunks: List[DocumentChunk], encoder: Any, cache: Optional[EmbeddingCache] = None) -> Tuple[Any, np.ndarray]:
+	embeddings = embed([c.text for c in chunks], encoder, cache)
+	index = faiss.IndexFlatIP(embeddings.shape[1])
+	faiss.normalize_L2(embeddings)
+	index.add(embeddings)
+	return index, embeddings
+
+
+def retrieve_many(queries: List[str], store: VectorStore, encoder: Any, k: int = 4, batch_size: int = 64) -> List[List[Dict[str, Any]]]:
+	"""
+	Top-k docs for every query: queries are encoded in batches and searched as one matrix.
+	Each hit is {"score": float, **doc}, best first.
+	"""
+	if not queries:
+		return []
+	hits = store.search_many(embed(queries, encoder, batch_size=batch_size), k=k)
+	return [[{"score": float(score), **store.docs[idx]} for idx, score in row if idx != -1] for row in hits]
+
+
+def retrieve(query: str, store: VectorStore, encoder: Any, k: int = 4) -> List[Dict[str, Any]]:
+	return retrieve_many([query], store, encoder, k=k)[0]
+
+
+def retrieve_top_k_many(
+	queries: List[str],
+	chunks: List[DocumentChunk],
+	index: Any,
+	encoder: Any,
+	top_k: int = 3,
+	batch_size: int = 64,
+) -> List[List[Tuple[float, DocumentChunk]]]:
+	"""
+	Batched retrieve_top_k over a chunk index from build_faiss_index: (score, chunk) lists per query.
+	"""
+	if not queries:
+		return []
+	q_emb = embed(queries, encoder, batch_size=batch_size)
+	faiss.normalize_L2(q_emb)
+	scores, idxs = index.search(q_emb, top_k)
+	return [
+		[(float(score), chunks[int(idx)]) for score, idx in zip(row_scores, row_idxs) if idx != -1]
+		for row_scores, row_idxs in zip(scores, idxs)
+	]
+
+
+def retrieve_top_k(query: str, chunks: List[DocumentChunk], index: Any, encoder: Any, top_k: int = 3) -> List[Tuple[float, DocumentChunk]]:
+	return retrieve_top_k_many([query], chunks, index, encoder, top_k=top_k)[0]
+
+
+def chroma_upsert(collection: Any, records: List[Dict[str, Any]], encoder: Any, cache: Optional[EmbeddingCache] = None) -> int:
+	"""
+	Upsert KB records into a Chroma collection, reusing the vectors the FAISS build cached.
+	"""
+	docs = [r["content"] for r in records]
+	ids = [str(r["id"]) for r in records]
+	metas = [{"title": r.get("title", ""), **sanitize_meta(r.get("meta"))} for r in records]
+	vecs = embed(docs, encoder, cache).tolist()
+	collection.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=vecs)
+	return len(ids)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+
+# Fields lifted out of a KB line; everything else lands in "meta"
+RECORD_FIELDS = {"id", "_id", "title", "content", "text", "body"}
+
+
+class DocumentChunk:
+	def __init__(self, doc_id: str, chunk_id: int, text: str, meta: Dict[str, Any]):
+		self.doc_id = doc_id
+		self.chunk_id = chunk_id
+		self.text = text
+		self.meta = meta
+
+
+def iter_jsonl(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+	"""
+	Raw KB objects, one per non-empty line.
+	"""
+	with open(path, "r", encoding="utf-8") as f:
+		for line in f:
+			line = line.strip()
+			if line:
+				yield json.loads(line)
+
+
+def read_jsonl(path: Union[str, Path]) -> List[Dict[str, Any]]:
+	"""
+	KB records normalized to {id, title, content, meta}, as in the RAG notebooks.
+	"""
+	records = []
+	for obj in iter_jsonl(path):
+		content = obj.get("content") or obj.get("text") or obj.get("body")
+		if not content:
+			continue
+		records.append({
+			"id": obj.get("id") or obj.get("_id") or str(len(records)),
+			"title": obj.get("title") or "",
+			"content": content,
+			"meta": {k: v for k, v in obj.items() if k not in RECORD_FIELDS},
+		})
+	return records
+
+
+def chunk_text(text: str, max_tokens: int = 180, overlap: int = 30) -> List[str]:
+	"""
+	Whitespace chunking with overlap; tokens are approximated by words.
+	"""
+	words = text.split()
+	if not words:
+		return []
+	chunks = []
+	step = max_tokens - overlap
+	for i in range(0, len(words), step):
+		chunks.append(" ".join(words[i : i + max_tokens]))
+		if i + max_tokens >= len(words):
+			break
+	return chunks
+
+
+def build_corpus(kb_records: List[Dict[str, Any]]) -> List[DocumentChunk]:
+	"""
+	Chunk raw KB objects (title + content) into DocumentChunks with source metadata.
+	"""
+	corpus: List[DocumentChunk] = []
+	for rec in kb_records:
+		content = (rec.get("title", "") + "\n" + rec.get("content", "")).strip()
+		for idx, ch in enumerate(chunk_text(content, max_tokens=180, overlap=30)):
+			meta = {
+				"title": rec.get("title", ""),
+				"id": rec.get("id", ""),
+				"version": rec.get("version", ""),
+				"kind": rec.get("kind", ""),
+				"released": rec.get("released") or "",
+				"urls": [s.get("url") for s in rec.get("answer_card", {}).get("sources", [])],
+			}
+			corpus.append(DocumentChunk(str(rec.get("id", "")), idx, ch, meta))
+	return corpus
+
+
+def sanitize_meta(m: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	Metadata reduced to scalars (Chroma only accepts str/int/float/bool/None).
+	"""
+	out = {}
+	for k, v in (m or {}).items():
+		if isinstance(v, (str, int, float, bool)) or v is None:
+			out[k] = v
+		elif isinstance(v, (list, dict)):
+			out[k] = json.dumps(v, ensure_ascii=False)
+		else:
+			out[k] = str(v)
+	return out
+
+
+def record_id(rec: Dict[str, Any]) -> str:
+	return str(rec.get("id") or rec.get("_id") or "")
+
+
+def record_hash(rec: Dict[str, Any]) -> str:
+	"""
+	Content hash of a whole KB record (key order does not matter).
+	"""
+	return hashlib.sha256(json.dumps(rec, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class KBDiff:
+	added: List[str] = field(default_factory=list)
+	changed: List[str] = field(default_factory=list)
+	removed: List[str] = field(default_factory=list)
+	unchanged: List[str] = field(default_factory=list)
+
+	def __bool__(self) -> bool:
+		return bool(self.added or self.changed or self.removed)
+
+
+def diff_kb(known: Dict[str, str], records: Iterable[Dict[str, Any]]) -> KBDiff:
+	"""
+	Compare KB records against {record id: record_hash} from the last sync.
+	"""
+	diff = KBDiff()
+	seen = set()
+	for rec in records:
+		rid = record_id(rec)
+		seen.add(rid)
+		if rid not in known:
+			diff.added.append(rid)
+		elif known[rid] != record_hash(rec):
+			diff.changed.append(rid)
+		else:
+			diff.unchanged.append(rid)
+	diff.removed = [rid for rid in known if rid not in seen]
+	return diff
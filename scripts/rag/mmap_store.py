@@ -0,0 +1,189 @@
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .kb import DocumentChunk
+
+
+# Layout of a store directory:
+#   store.json    {"dim", "dtype", "count"}
+#   vectors.bin   count x dim rows of float16, or int8 (row-scaled, see below)
+#   scales.f32    int8 only: one float32 scale per row, v ~= q * scale / 127
+#   docs.jsonl    one JSON doc per row
+#   docs.idx      count + 1 uint64 byte offsets into docs.jsonl
+DTYPES = {"float16": np.float16, "int8": np.int8}
+SEARCH_BLOCK = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+	vectors = np.asarray(vectors, dtype=np.float32)
+	norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+	return vectors / np.maximum(norms, 1e-12)
+
+
+def _release(arr: np.ndarray, lo: int, hi: int) -> None:
+	"""
+	Tell the kernel the pages behind rows [lo, hi) of a memmap are no longer needed, so a full
+	scan does not leave the whole file resident. A no-op for in-memory arrays and on platforms
+	without MADV_DONTNEED.
+	"""
+	buf = getattr(arr, "_mmap", None)
+	if buf is None or not hasattr(mmap, "MADV_DONTNEED") or hi <= lo:
+		return
+	row_bytes = arr.strides[0]
+	start = lo * row_bytes // mmap.PAGESIZE * mmap.PAGESIZE
+	buf.madvise(mmap.MADV_DONTNEED, start, min(hi * row_bytes, len(buf)) - start)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	Symmetric per-row scalar quantization: returns (int8 rows, float32 row scales).
+	"""
+	scales = np.abs(vectors).max(axis=1).astype(np.float32)
+	safe = np.where(scales > 0, scales, 1.0)
+	q = np.rint(vectors / safe[:, None] * 127).clip(-127, 127).astype(np.int8)
+	return q, scales
+
+
+def chunk_doc(ch: DocumentChunk) -> Dict[str, Any]:
+	return {"doc_id": ch.doc_id, "chunk_id": ch.chunk_id, "text": ch.text, "meta": ch.meta}
+
+
+class MmapStoreWriter:
+	"""
+	Streams L2-normalized vectors and their docs into a store directory, batch by batch.
+	"""
+
+	def __init__(self, path: Path, dim: int, dtype: str = "float16"):
+		if dtype not in DTYPES:
+			raise ValueError(f"unsupported dtype {dtype!r}; expected one of {sorted(DTYPES)}")
+		self.path = Path(path)
+		self.path.mkdir(parents=True, exist_ok=True)
+		self.dim = dim
+		self.dtype = dtype
+		self.count = 0
+		self._vectors = open(self.path / "vectors.bin", "wb")
+		self._scales = open(self.path / "scales.f32", "wb") if dtype == "int8" else None
+		self._docs = open(self.path / "docs.jsonl", "wb")
+		self._offsets = [0]
+
+	def add(self, vectors: np.ndarray, docs: List[Dict[str, Any]]) -> None:
+		vectors = _normalize(np.asarray(vectors).reshape(-1, self.dim))
+		if len(vectors) != len(docs):
+			raise ValueError(f"{len(vectors)} vectors for {len(docs)} docs")
+		if self.dtype == "int8":
+			q, scales = quantize_int8(vectors)
+			self._vectors.write(q.tobytes())
+			self._scales.write(scales.tobytes())
+		else:
+			self._vectors.write(vectors.astype(np.float16).tobytes())
+		for doc in docs:
+			self._docs.write(json.dumps(doc, ensure_ascii=False).encode("utf-8") + b"\n")
+			self._offsets.append(self._docs.tell())
+		self.count += len(docs)
+
+	def close(self) -> None:
+		for f in (self._vectors, self._scales, self._docs):
+			if f is not None:
+				f.close()
+		np.asarray(self._offsets, dtype=np.uint64).tofile(self.path / "docs.idx")
+		with open(self.path / "store.json", "w", encoding="utf-8") as f:
+			json.dump({"dim": self.dim, "dtype": self.dtype, "count": self.count}, f)
+
+	def __enter__(self) -> "MmapStoreWriter":
+		return self
+
+	def __exit__(self, *exc: Any) -> None:
+		self.close()
+
+
+def write_store(path: Path, vectors: np.ndarray, docs: Iterable[Any], dtype: str = "float16") -> None:
+	"""
+	Persist vectors plus docs (dicts or DocumentChunks) in one go.
+	"""
+	docs = [chunk_doc(d) if isinstance(d, DocumentChunk) else d for d in docs]
+	vectors = np.asarray(vectors)
+	with MmapStoreWriter(path, vectors.shape[1], dtype) as writer:
+		writer.add(vectors, docs)
+
+
+class MmapStore:
+	"""
+	Read side of a store directory. Opening only maps files and a doc is read from disk only
+	when a hit asks for it. Search is exact (inner product on the stored normalized vectors):
+	every query reads all vector rows (or all `rows` given), in blocks of SEARCH_BLOCK rows whose
+	pages are released once scored, so resident memory stays around one block plus the hits
+	rather than the whole vector file.
+	"""
+
+	def __init__(self, path: Path):
+		self.path = Path(path)
+		with open(self.path / "store.json", "r", encoding="utf-8") as f:
+			config = json.load(f)
+		self.dim = config["dim"]
+		self.dtype = config["dtype"]
+		self.count = config["count"]
+		shape = (self.count, self.dim)
+		self.vectors = np.memmap(self.path / "vectors.bin", dtype=DTYPES[self.dtype], mode="r", shape=shape) if self.count else np.empty(shape, DTYPES[self.dtype])
+		self.scales = np.memmap(self.path / "scales.f32", dtype=np.float32, mode="r", shape=(self.count,)) if self.dtype == "int8" and self.count else None
+		self._offsets = np.memmap(self.path / "docs.idx", dtype=np.uint64, mode="r")
+		self._docs = open(self.path / "docs.jsonl", "rb")
+
+	def __len__(self) -> int:
+		return self.count
+
+	def close(self) -> None:
+		self._docs.close()
+
+	def doc(self, row: int) -> Dict[str, Any]:
+		start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+		self._docs.seek(start)
+		return json.loads(self._docs.read(end - start))
+
+	def chunk(self, row: int) -> DocumentChunk:
+		d = self.doc(row)
+		return DocumentChunk(d["doc_id"], d["chunk_id"], d["text"], d["meta"])
+
+	def _block_scores(self, queries: np.ndarray, rows: Any) -> np.ndarray:
+		block = np.asarray(self.vectors[rows], dtype=np.float32)
+		scores = queries @ block.T
+		if self.scales is not None:
+			scores *= np.asarray(self.scales[rows]) / 127
+		lo, hi = (rows.start, rows.stop) if isinstance(rows, slice) else (int(rows.min()), int(rows.max()) + 1)
+		for arr in (self.vectors, self.scales):
+			if arr is not None:
+				_release(arr, lo, hi)
+		return scores
+
+	def search_many(self, query_embs: np.ndarray, k: int = 5, rows: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+		"""
+		(row, score) pairs per query, best first. With `rows` (e.g. from
+		filters.MetadataIndex.rows), only those rows are read and scored.
+		"""
+		queries = _normalize(np.asarray(query_embs).reshape(-1, self.dim))
+		n = self.count if rows is None else len(rows)
+		best_rows = np.empty((len(queries), 0), dtype=np.int64)
+		best_scores = np.empty((len(queries), 0), dtype=np.float32)
+		for start in range(0, n, SEARCH_BLOCK):
+			stop = min(start + SEARCH_BLOCK, n)
+			block_rows = np.arange(start, stop) if rows is None else np.asarray(rows[start:stop], dtype=np.int64)
+			scores = np.concatenate([best_scores, self._block_scores(queries, slice(start, stop) if rows is None else block_rows)], axis=1)
+			cand_rows = np.concatenate([best_rows, np.broadcast_to(block_rows, (len(queries), stop - start))], axis=1)
+			if scores.shape[1] > k:
+				keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+				scores = np.take_along_axis(scores, keep, axis=1)
+				cand_rows = np.take_along_axis(cand_rows, keep, axis=1)
+			best_scores, best_rows = scores, cand_rows
+		order = np.argsort(-best_scores, axis=1, kind="stable")
+		best_rows = np.take_along_axis(best_rows, order, axis=1)
+		best_scores = np.take_along_axis(best_scores, order, axis=1)
+		return [list(zip(r.tolist(), s.tolist())) for r, s in zip(best_rows, best_scores)]
+
+	def retrieve_many(self, query_embs: np.ndarray, k: int = 4, rows: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+		"""
+		Hits as {"score": float, **doc}; only the hit docs are read.
+		"""
+		return [[{"score": float(score), **self.doc(row)} for row, score in hits] for hits in self.search_many(query_embs, k, rows)]
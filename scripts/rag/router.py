@@ -0,0 +1,108 @@
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class AhoCorasick:
+	"""
+	Multi-pattern substring matcher: one automaton over all patterns, one pass over the text.
+
+	Matching costs O(len(text) + number of matches) regardless of how many patterns there are.
+	"""
+
+	def __init__(self, patterns: Sequence[str]):
+		self.patterns = list(patterns)
+		self._goto: List[Dict[str, int]] = [{}]
+		self._fail: List[int] = [0]
+		self._out: List[List[int]] = [[]]
+		for pid, pattern in enumerate(self.patterns):
+			if not pattern:
+				continue
+			node = 0
+			for ch in pattern:
+				nxt = self._goto[node].get(ch)
+				if nxt is None:
+					nxt = len(self._goto)
+					self._goto[node][ch] = nxt
+					self._goto.append({})
+					self._fail.append(0)
+					self._out.append([])
+				node = nxt
+			self._out[node].append(pid)
+		self._link()
+
+	def _link(self) -> None:
+		# Breadth-first, so a node's failure target is finished before its children need it
+		queue = deque(self._goto[0].values())
+		while queue:
+			node = queue.popleft()
+			for ch, child in self._goto[node].items():
+				queue.append(child)
+				f = self._fail[node]
+				while f and ch not in self._goto[f]:
+					f = self._fail[f]
+				target = self._goto[f].get(ch, 0)
+				self._fail[child] = target if target != child else 0
+				self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+	def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+		"""
+		(end offset, pattern id) for every occurrence of every pattern in text.
+		"""
+		node = 0
+		goto, fail, out = self._goto, self._fail, self._out
+		for i, ch in enumerate(text):
+			while node and ch not in goto[node]:
+				node = fail[node]
+			node = goto[node].get(ch, 0)
+			for pid in out[node]:
+				yield i + 1, pid
+
+
+def format_card(card: Dict[str, Any]) -> str:
+	return (
+		f"**Answer:** {card['one_sentence']}\n\n"
+		f"**Example:**\n"
+		f"```python\n{card['example']}\n```\n\n"
+		f"**Why it matters:** {card['why_it_matters']}\n\n"
+		f"**Sources:**\n" + "\n".join(
+			[f"- {s['title']}: {s['url']}" for s in card["sources"]]
+		)
+	)
+
+
+class AnswerCardRouter:
+	"""
+	Routes a question to the KB records whose answer_card["question_pattern"] occurs in it
+	(case-insensitive), as the notebook's linear scan did, but with all patterns compiled into
+	one automaton. Cards are ranked by longest matching pattern, then KB order.
+	Records without a card or with an empty pattern are never routed to.
+	"""
+
+	def __init__(self, kb_records: Sequence[Dict[str, Any]]):
+		self.records = [rec for rec in kb_records if (rec.get("answer_card") or {}).get("question_pattern")]
+		self._matcher = AhoCorasick([rec["answer_card"]["question_pattern"].lower() for rec in self.records])
+
+	def __len__(self) -> int:
+		return len(self.records)
+
+	def match(self, query: str) -> List[Dict[str, Any]]:
+		"""
+		Every record whose pattern occurs in the query, best (longest pattern) first.
+		"""
+		found = {pid for _, pid in self._matcher.iter_matches(query.lower())}
+		ranked = sorted(found, key=lambda pid: (-len(self._matcher.patterns[pid]), pid))
+		return [self.records[pid] for pid in ranked]
+
+	def route(self, query: str) -> Optional[Dict[str, Any]]:
+		matches = self.match(query)
+		return matches[0] if matches else None
+
+
+def answer_with_card_or_rag(query: str, router: AnswerCardRouter, rag_answer: Callable[..., str], top_k: int = 1) -> str:
+	"""
+	Formatted answer card for the best-matching record; retrieval only when no card matches.
+	"""
+	rec = router.route(query)
+	if rec is not None:
+		return format_card(rec["answer_card"])
+	return rag_answer(query, top_k=top_k)